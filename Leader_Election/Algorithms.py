@@ -1,84 +1,155 @@
 from State import State
 from abc import ABC, abstractmethod
-from Message import Message, ElectMessage
+from Direction import Direction
+from Message import Message, ElectMessage, WakeUpMessage, RelayedMessage, DirectedMessage, ProbeMessage, \
+    ReplyMessage
 
 
 class Algorithm(ABC):
+    # Whether every message is sent in the direction of the ring. Algorithms that choose the direction of each
+    # message set this to False, and the ring then links every node to both of its neighbours.
+    unidirectional = True
+
     @abstractmethod
-    def act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message):
+    def act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message, node_memory=None):
         """
         This value should likely return the node_state, new node value and the message to send.
         :param node_state: The state of the current node. Defeated or Active.
         :param node_value: The value of the current node.
         :param node_stage: The stage that the current node is in.
         :param incoming_message: The incoming message in the message buffer.
+        :param node_memory: What the algorithm keeps in the current node, as created by initial_memory. Only
+        passed when initial_memory returns something, so algorithms without a memory may leave it out of act.
         :return: (State, int, Message) --> (node_state, node_value, outgoing_message)
+        The outgoing message is sent in the direction of the ring. To choose the direction of each message, return
+        a list of (Message, Direction) pairs instead. None sends nothing.
         """
         pass
 
+    def initial_memory(self):
+        """
+        Algorithms that need to remember more than the state, value and stage of a node override this to return a
+        new, mutable object. Every node is given its own, which is passed to act as node_memory.
+        :return: None, as MinMax and MinMaxPlus need no memory.
+        """
+        return None
 
-class MinMax(Algorithm):
 
-    def process_message(self, node_state: State, node_value: int, incoming_message: ElectMessage):
-        if incoming_message.stage % 2 == 0 and incoming_message.value > node_value:
-            # Here the message sent will contain our own value
-            return State.CANDIDATE, incoming_message.value, new_message(incoming_message)
-        elif incoming_message.stage % 2 == 1 and incoming_message.value < node_value:
-            # Here again the message will contain our own value
-            return State.CANDIDATE, incoming_message.value, new_message(incoming_message)
-        # Otherwise the node will become defeated and the message will not continue any further
-        return State.DEFEATED, node_value, None
+class TableAlgorithm(Algorithm):
+    """
+    An algorithm declared as a transition table. Each entry maps (node state, type of the incoming message,
+    parity of the message stage) onto the name of the method that handles that case. A parity of None declares a
+    transition that does not depend on the stage. Every handler takes the same arguments as act.
+    The table is compiled into bound methods when the algorithm is created, so choosing a handler costs a single
+    lookup per message. The stage of the message is only read for the transitions that depend on its parity.
+    """
+    # Maps (State, message type, stage parity) onto the name of a handler. Declared by each algorithm.
+    transitions = {}
+
+    def __init__(self):
+        # Maps (State, message type) onto a handler, or onto a pair of handlers for the even and odd stages
+        self._table = {}
+        for node_state, message_type, parity in self.transitions:
+            if parity is None:
+                self._table[node_state, message_type] = self.handler(node_state, message_type, None)
+            else:
+                self._table[node_state, message_type] = (self.handler(node_state, message_type, 0),
+                                                         self.handler(node_state, message_type, 1))
+
+    def handler(self, node_state: State, message_type: type, parity: int):
+        """
+        :return: The bound handler for the given transition. One that raises an exception if it was not declared.
+        """
+        name = self.transitions.get((node_state, message_type, parity))
+        return self.no_transition if name is None else getattr(self, name)
+
+    def no_transition(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message,
+                      node_memory=None):
+        raise Exception(f"{type(self).__name__} has no transition for a {type(incoming_message).__name__} "
+                        f"received in the state {node_state.value}.")
 
-    def asleep_act(self, node_state: State, node_value: int, incoming_message: Message):
+    def act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message, node_memory=None):
+        handler = self._table.get((node_state, type(incoming_message)), self.no_transition)
+        if handler.__class__ is tuple:
+            handler = handler[incoming_message.stage & 1]
+
+        return handler(node_state, node_value, node_stage, incoming_message, node_memory)
+
+
+class MinMax(TableAlgorithm):
+    transitions = {
+        (State.ORIGINATOR, type(None), None): "originator_act",
+        (State.ORIGINATOR, WakeUpMessage, None): "originator_act",
+        (State.ASLEEP, ElectMessage, None): "asleep_act",
+        (State.CANDIDATE, ElectMessage, 0): "even_candidate_act",
+        (State.CANDIDATE, ElectMessage, 1): "odd_candidate_act",
+        (State.DEFEATED, ElectMessage, None): "defeated_act",
+    }
+
+    def asleep_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message,
+                   node_memory=None):
         # In the general case we become defeated and forward the message
         return State.DEFEATED, node_value, incoming_message
 
-    def originator_act(self, node_state: State, node_value: int, incoming_message: Message):
+    def originator_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message,
+                       node_memory=None):
         # If the node state is an originator then we begin the message chain.
-        return State.CANDIDATE, node_value, ElectMessage(node_value, 1, 0)
+        return State.CANDIDATE, node_value, ElectMessage.create(node_value, 1, 0)
 
-    def candidate_act(self, node_state: State, node_value: int, incoming_message: ElectMessage):
+    def even_candidate_act(self, node_state: State, node_value: int, node_stage: int,
+                           incoming_message: ElectMessage, node_memory=None):
         if node_value == incoming_message.value:
             # In this case we have been elected
             return State.LEADER, node_value, None
-        # General case we process the message
-        return self.process_message(node_state, node_value, incoming_message)
-
-    def defeated_act(self, node_state: State, node_value: int, incoming_message: Message):
-        # Simply forward the message
-        return node_state, node_value, incoming_message
-
-    def act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message):
-        if node_state == State.ORIGINATOR:
-            return self.originator_act(node_state, node_value, incoming_message)
-        elif node_state == State.ASLEEP:
-            return self.asleep_act(node_state, node_value, incoming_message)
-        elif node_state == State.CANDIDATE:
-            return self.candidate_act(node_state, node_value, incoming_message)
-        elif node_state == State.DEFEATED:
-            return self.defeated_act(node_state, node_value, incoming_message)
-
-
-class MinMaxPlus(Algorithm):
-    def process_message(self, node_state: State, node_value: int, incoming_message: ElectMessage):
-        if incoming_message.stage % 2 == 0 and incoming_message.value > node_value:
+        elif incoming_message.value > node_value:
             # Here the message sent will contain our own value
             return State.CANDIDATE, incoming_message.value, new_message(incoming_message)
-        elif incoming_message.stage % 2 == 1 and incoming_message.value < node_value:
+        # Otherwise the node will become defeated and the message will not continue any further
+        return State.DEFEATED, node_value, None
+
+    def odd_candidate_act(self, node_state: State, node_value: int, node_stage: int,
+                          incoming_message: ElectMessage, node_memory=None):
+        if node_value == incoming_message.value:
+            # In this case we have been elected
+            return State.LEADER, node_value, None
+        elif incoming_message.value < node_value:
             # Here again the message will contain our own value
             return State.CANDIDATE, incoming_message.value, new_message(incoming_message)
         # Otherwise the node will become defeated and the message will not continue any further
         return State.DEFEATED, node_value, None
 
-    def asleep_act(self, node_state: State, node_value: int, incoming_message: Message):
+    def defeated_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message,
+                     node_memory=None):
+        # Simply forward the message
+        return node_state, node_value, incoming_message
+
+
+class MinMaxPlus(TableAlgorithm):
+    # Every handler receiving an ElectMessage starts by reducing the message counter
+    transitions = {
+        (State.ORIGINATOR, type(None), None): "originator_act",
+        (State.ORIGINATOR, WakeUpMessage, None): "originator_act",
+        (State.ASLEEP, ElectMessage, None): "asleep_act",
+        (State.CANDIDATE, ElectMessage, 0): "even_candidate_act",
+        (State.CANDIDATE, ElectMessage, 1): "odd_candidate_act",
+        (State.DEFEATED, ElectMessage, 0): "even_defeated_act",
+        (State.DEFEATED, ElectMessage, 1): "odd_defeated_act",
+    }
+
+    def asleep_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: ElectMessage,
+                   node_memory=None):
+        incoming_message.counter -= 1
         # In the general case we become defeated and forward the message
         return State.DEFEATED, node_value, forwarded_message(incoming_message)
 
-    def originator_act(self, node_state: State, node_value: int, incoming_message: Message):
+    def originator_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message,
+                       node_memory=None):
         # If the node state is an originator then we begin the message chain.
-        return State.CANDIDATE, node_value, ElectMessage(node_value, 1, 0)
+        return State.CANDIDATE, node_value, ElectMessage.create(node_value, 1, 0)
 
-    def candidate_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: ElectMessage):
+    def even_candidate_act(self, node_state: State, node_value: int, node_stage: int,
+                           incoming_message: ElectMessage, node_memory=None):
+        incoming_message.counter -= 1
         # In this case we have been elected
         if node_value == incoming_message.value:
             return State.LEADER, node_value, None
@@ -88,35 +159,55 @@ class MinMaxPlus(Algorithm):
         # In this case, the candidate will become defeated if it is receiving a message from the next step
         elif node_stage < incoming_message.stage:
             return State.DEFEATED, node_value, forwarded_message(incoming_message)
+        elif incoming_message.value > node_value:
+            # Here the message sent will contain our own value
+            return State.CANDIDATE, incoming_message.value, new_message(incoming_message)
+        # Otherwise the node will become defeated and the message will not continue any further
+        return State.DEFEATED, node_value, None
 
-        # General case we process the message
-        return self.process_message(node_state, node_value, incoming_message)
-
-    def defeated_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message):
-        if isinstance(incoming_message, ElectMessage):
-            # This case handles when the node is defeated and the counter reaches 0 in an even stage
-            if incoming_message.counter == 0:
-                return State.CANDIDATE, incoming_message.value, new_message(incoming_message)
-            # This is the case that handles rule 4
-            elif node_stage % 2 == 0 and incoming_message.stage == node_stage + 1 \
-                    and incoming_message.value < node_value:
-                return State.CANDIDATE, incoming_message.value, new_message(incoming_message)
+    def odd_candidate_act(self, node_state: State, node_value: int, node_stage: int,
+                          incoming_message: ElectMessage, node_memory=None):
+        incoming_message.counter -= 1
+        # In this case we have been elected
+        if node_value == incoming_message.value:
+            return State.LEADER, node_value, None
+        # Case where counter becomes 0. Placing this here, preempts other cases in which we may become defeated.
+        elif incoming_message.counter == 0:
+            return State.CANDIDATE, incoming_message.value, new_message(incoming_message)
+        # In this case, the candidate will become defeated if it is receiving a message from the next step
+        elif node_stage < incoming_message.stage:
+            return State.DEFEATED, node_value, forwarded_message(incoming_message)
+        elif incoming_message.value < node_value:
+            # Here again the message will contain our own value
+            return State.CANDIDATE, incoming_message.value, new_message(incoming_message)
+        # Otherwise the node will become defeated and the message will not continue any further
+        return State.DEFEATED, node_value, None
+
+    def even_defeated_act(self, node_state: State, node_value: int, node_stage: int,
+                          incoming_message: ElectMessage, node_memory=None):
+        incoming_message.counter -= 1
+        # This case handles when the node is defeated and the counter reaches 0 in an even stage
+        if incoming_message.counter == 0:
+            return State.CANDIDATE, incoming_message.value, new_message(incoming_message)
+        # Simply forward the message, otherwise.
+        return node_state, node_value, forwarded_message(incoming_message)
+
+    def odd_defeated_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: ElectMessage,
+                         node_memory=None):
+        incoming_message.counter -= 1
+        if incoming_message.counter == 0:
+            return State.CANDIDATE, incoming_message.value, new_message(incoming_message)
+        # This is the case that handles rule 4. The message stage is odd, so the node stage is even.
+        elif incoming_message.stage == node_stage + 1 and incoming_message.value < node_value:
+            return State.CANDIDATE, incoming_message.value, new_message(incoming_message)
         # Simply forward the message, otherwise.
         return node_state, node_value, forwarded_message(incoming_message)
 
-    def act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message):
-        # Reduce message counter
-        if isinstance(incoming_message, ElectMessage):
-            incoming_message.counter -= 1
 
-        if node_state == State.ORIGINATOR:
-            return self.originator_act(node_state, node_value, incoming_message)
-        elif node_state == State.ASLEEP:
-            return self.asleep_act(node_state, node_value, incoming_message)
-        elif node_state == State.CANDIDATE:
-            return self.candidate_act(node_state, node_value, node_stage, incoming_message)
-        elif node_state == State.DEFEATED:
-            return self.defeated_act(node_state, node_value, node_stage, incoming_message)
+# The Fibonacci numbers computed so far. Shared by every call, and extended when a larger index is needed.
+FIBONACCI = [0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233]
+# The counter a new message starts with in each stage. Precomputed for the stages any realistic ring reaches.
+STAGE_COUNTERS = []
 
 
 def fibonacci_number(index):
@@ -127,14 +218,28 @@ def fibonacci_number(index):
     :param index: The value of the index we wish to get.
     :return: The fibonacci number at the given index.
     """
-    # Our seed Fibonacci numbers.
-    sequence = [0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233]
-
     # We will extend the series if it is not long enough.
-    while index + 2 > len(sequence) - 1:
-        sequence.append(sequence[len(sequence) - 1] + sequence[len(sequence) - 2])
+    while index + 2 > len(FIBONACCI) - 1:
+        FIBONACCI.append(FIBONACCI[len(FIBONACCI) - 1] + FIBONACCI[len(FIBONACCI) - 2])
 
-    return sequence[index + 2]
+    return FIBONACCI[index + 2]
+
+
+def stage_counter(stage):
+    """
+    The counter of a new message is the i-th fibonacci number in an even stage, and -1 in an odd stage.
+    :param stage: The stage of the new message.
+    :return: The counter the message starts with.
+    """
+    while stage >= len(STAGE_COUNTERS):
+        next_stage = len(STAGE_COUNTERS)
+        STAGE_COUNTERS.append(fibonacci_number(next_stage) if next_stage % 2 == 0 else -1)
+
+    return STAGE_COUNTERS[stage]
+
+
+# The number of stages grows with the logarithm of the size of the ring, so 128 stages covers any ring we can build
+stage_counter(127)
 
 
 def forwarded_message(incoming_message: ElectMessage):
@@ -156,6 +261,234 @@ def new_message(incoming_message: ElectMessage):
     incoming_message.stage += 1
 
     # Update the counter to the i-th fibonacci number if we are in an even stage.
-    incoming_message.counter = fibonacci_number(incoming_message.stage) if incoming_message.stage % 2 == 0 else -1
+    incoming_message.counter = stage_counter(incoming_message.stage)
 
     return incoming_message
+
+
+class ChangRoberts(TableAlgorithm):
+    """
+    Every candidate sends its value around the ring. A candidate swallows the values smaller than its own and is
+    defeated by the larger ones, so only the largest value makes it all the way round. O(n * k) messages for k
+    originators.
+    """
+    transitions = {
+        (State.ORIGINATOR, type(None), None): "originator_act",
+        (State.ORIGINATOR, WakeUpMessage, None): "originator_act",
+        (State.ASLEEP, ElectMessage, None): "asleep_act",
+        (State.CANDIDATE, ElectMessage, None): "candidate_act",
+        (State.DEFEATED, ElectMessage, None): "defeated_act",
+    }
+
+    def originator_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message,
+                       node_memory=None):
+        return State.CANDIDATE, node_value, ElectMessage.create(node_value, 1, 0)
+
+    def asleep_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: ElectMessage,
+                   node_memory=None):
+        # Nodes that did not start the election only pass the values on
+        return State.DEFEATED, node_value, incoming_message
+
+    def candidate_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: ElectMessage,
+                      node_memory=None):
+        if incoming_message.value == node_value:
+            # Our value made it all the way round
+            return State.LEADER, node_value, None
+        elif incoming_message.value > node_value:
+            return State.DEFEATED, node_value, incoming_message
+        # The smaller value goes no further
+        return State.CANDIDATE, node_value, None
+
+    def defeated_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: ElectMessage,
+                     node_memory=None):
+        return node_state, node_value, incoming_message
+
+
+class Peterson(TableAlgorithm):
+    """
+    Peterson's algorithm for a ring in which messages travel one way. In each stage a candidate learns the values of
+    the two candidates before it. It stays a candidate, taking on the value of the nearer one, only if that value is
+    larger than the other two. At most half of the candidates survive each stage, giving O(n log k) messages.
+    The value received from the nearer candidate is kept in the memory of the node until the second value arrives.
+    """
+    transitions = {
+        (State.ORIGINATOR, type(None), None): "originator_act",
+        (State.ORIGINATOR, WakeUpMessage, None): "originator_act",
+        (State.ASLEEP, ElectMessage, None): "asleep_act",
+        (State.ASLEEP, RelayedMessage, None): "asleep_act",
+        (State.CANDIDATE, ElectMessage, None): "first_value_act",
+        (State.CANDIDATE, RelayedMessage, None): "second_value_act",
+        (State.DEFEATED, ElectMessage, None): "defeated_act",
+        (State.DEFEATED, RelayedMessage, None): "defeated_act",
+    }
+
+    def initial_memory(self):
+        return {}
+
+    def originator_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message,
+                       node_memory=None):
+        return State.CANDIDATE, node_value, ElectMessage.create(node_value, 1, 0)
+
+    def asleep_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message,
+                   node_memory=None):
+        return State.DEFEATED, node_value, incoming_message
+
+    def first_value_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: ElectMessage,
+                        node_memory=None):
+        if incoming_message.value == node_value:
+            # We are the only candidate left
+            return State.LEADER, node_value, None
+        node_memory["nearer"] = incoming_message.value
+        return State.CANDIDATE, node_value, RelayedMessage(incoming_message.value, incoming_message.stage)
+
+    def second_value_act(self, node_state: State, node_value: int, node_stage: int,
+                         incoming_message: RelayedMessage, node_memory=None):
+        nearer = node_memory.pop("nearer")
+        if nearer > max(node_value, incoming_message.value):
+            return State.CANDIDATE, nearer, ElectMessage.create(nearer, incoming_message.stage + 1, 0)
+        return State.DEFEATED, node_value, None
+
+    def defeated_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message,
+                     node_memory=None):
+        return node_state, node_value, incoming_message
+
+
+class HirschbergSinclair(TableAlgorithm):
+    """
+    In stage i, every candidate probes the nodes up to 2^i hops away on both sides. A probe is swallowed by any
+    candidate with a larger value, and otherwise answered by the last node it reaches. A candidate that gets both
+    answers moves on to the next stage, and the one whose probe comes back round is elected. O(n log n) messages.
+    The number of answers a candidate has had in its stage is kept in the memory of the node.
+    """
+    unidirectional = False
+
+    transitions = {
+        (State.ORIGINATOR, type(None), None): "originator_act",
+        (State.ORIGINATOR, WakeUpMessage, None): "originator_act",
+        (State.ASLEEP, ProbeMessage, None): "relay_probe_act",
+        (State.ASLEEP, ReplyMessage, None): "relay_reply_act",
+        (State.CANDIDATE, ProbeMessage, None): "candidate_probe_act",
+        (State.CANDIDATE, ReplyMessage, None): "candidate_reply_act",
+        (State.DEFEATED, ProbeMessage, None): "relay_probe_act",
+        (State.DEFEATED, ReplyMessage, None): "relay_reply_act",
+        (State.LEADER, ProbeMessage, None): "leader_act",
+    }
+
+    def initial_memory(self):
+        return {}
+
+    @staticmethod
+    def probes(value, stage):
+        return [(ProbeMessage(value, stage, direction, 1), direction)
+                for direction in (Direction.LEFT, Direction.RIGHT)]
+
+    def originator_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message,
+                       node_memory=None):
+        node_memory["replies"] = 0
+        return State.CANDIDATE, node_value, self.probes(node_value, 0)
+
+    def relay_probe_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: ProbeMessage,
+                        node_memory=None):
+        # Nodes that are not candidates never swallow a probe
+        if incoming_message.hops < 2 ** incoming_message.stage:
+            incoming_message.hops += 1
+            return State.DEFEATED, node_value, [(incoming_message, incoming_message.direction)]
+        # The probe has gone as far as it may, so we answer it
+        direction = incoming_message.direction.opposite
+        return State.DEFEATED, node_value, [(ReplyMessage(incoming_message.value, incoming_message.stage, direction),
+                                             direction)]
+
+    def relay_reply_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: ReplyMessage,
+                        node_memory=None):
+        if incoming_message.value == node_value:
+            # The answer to a probe we sent before we were defeated
+            return State.DEFEATED, node_value, None
+        return State.DEFEATED, node_value, [(incoming_message, incoming_message.direction)]
+
+    def candidate_probe_act(self, node_state: State, node_value: int, node_stage: int,
+                            incoming_message: ProbeMessage, node_memory=None):
+        if incoming_message.value == node_value:
+            # Our probe made it all the way round
+            return State.LEADER, node_value, None
+        elif incoming_message.value > node_value:
+            return self.relay_probe_act(node_state, node_value, node_stage, incoming_message, node_memory)
+        # The smaller probe goes no further
+        return State.CANDIDATE, node_value, None
+
+    def candidate_reply_act(self, node_state: State, node_value: int, node_stage: int,
+                            incoming_message: ReplyMessage, node_memory=None):
+        if incoming_message.value != node_value:
+            return self.relay_reply_act(node_state, node_value, node_stage, incoming_message, node_memory)
+
+        node_memory["replies"] += 1
+        if node_memory["replies"] < 2:
+            return State.CANDIDATE, node_value, None
+        # Both sides answered, so we probe twice as far
+        node_memory["replies"] = 0
+        return State.CANDIDATE, node_value, self.probes(node_value, incoming_message.stage + 1)
+
+    def leader_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message,
+                   node_memory=None):
+        # Our probe also came back round the other way
+        return node_state, node_value, None
+
+
+class Franklin(TableAlgorithm):
+    """
+    In every stage, each candidate sends its value to the nearest candidate on both sides. A candidate stays one only
+    if its value is larger than both values it receives. At least half of the candidates are defeated in each stage,
+    giving O(n log k) messages. The candidate whose value comes back to it is elected.
+    Values that arrive before the candidate has heard from both sides wait in the memory of the node.
+    """
+    unidirectional = False
+
+    transitions = {
+        (State.ORIGINATOR, type(None), None): "originator_act",
+        (State.ORIGINATOR, WakeUpMessage, None): "originator_act",
+        (State.ASLEEP, DirectedMessage, None): "relay_act",
+        (State.CANDIDATE, DirectedMessage, None): "candidate_act",
+        (State.DEFEATED, DirectedMessage, None): "relay_act",
+        (State.LEADER, DirectedMessage, None): "leader_act",
+    }
+
+    def initial_memory(self):
+        return {}
+
+    @staticmethod
+    def values(value, stage):
+        return [(DirectedMessage(value, stage, direction), direction)
+                for direction in (Direction.LEFT, Direction.RIGHT)]
+
+    def originator_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message,
+                       node_memory=None):
+        # The values waiting from the candidates on each side, by the direction they travel in
+        node_memory[Direction.LEFT], node_memory[Direction.RIGHT] = [], []
+        return State.CANDIDATE, node_value, self.values(node_value, 1)
+
+    def relay_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: DirectedMessage,
+                  node_memory=None):
+        return State.DEFEATED, node_value, [(incoming_message, incoming_message.direction)]
+
+    def candidate_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: DirectedMessage,
+                      node_memory=None):
+        if incoming_message.value == node_value:
+            # We are the only candidate left
+            return State.LEADER, node_value, None
+
+        node_memory[incoming_message.direction].append(incoming_message)
+        if not node_memory[Direction.LEFT] or not node_memory[Direction.RIGHT]:
+            return State.CANDIDATE, node_value, None
+
+        left, right = node_memory[Direction.LEFT].pop(0), node_memory[Direction.RIGHT].pop(0)
+        if node_value > max(left.value, right.value):
+            return State.CANDIDATE, node_value, self.values(node_value, node_stage + 1)
+
+        # We are defeated. A neighbour that survived may already have sent its next value, which we pass on.
+        waiting = [(message, message.direction) for direction in (Direction.LEFT, Direction.RIGHT)
+                   for message in node_memory.pop(direction)]
+        return State.DEFEATED, node_value, waiting or None
+
+    def leader_act(self, node_state: State, node_value: int, node_stage: int, incoming_message: Message,
+                   node_memory=None):
+        # Our value also came back round the other way
+        return node_state, node_value, None
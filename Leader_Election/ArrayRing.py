@@ -0,0 +1,171 @@
+from collections import deque
+
+import numpy as np
+
+from Algorithms import Algorithm
+from Direction import Direction
+from EventLog import STATES, STATE_CODES
+from Generators import generate_values, choose_originators
+from Message import ElectMessage
+from State import State
+
+
+class ArrayRing:
+    """
+    A ring that keeps the values, states and stages of its nodes in NumPy arrays instead of Node objects.
+    The neighbours of a node are found from its index, so a node costs a handful of bytes rather than a Python object,
+    which lets us run elections on rings of millions of nodes.
+    """
+    def __init__(self, values, direction: Direction, algorithm: Algorithm, number_of_originators, seed=None,
+                 originator_strategy="random"):
+        """
+        :param values: The values of the nodes from left to right. Any iterable of ints, or a NumPy array.
+        :param direction: The direction to send messages.
+        :param algorithm: The algorithm we are using.
+        :param number_of_originators: How many nodes are chosen to start the election.
+        :param seed: The seed used to choose the originators.
+        :param originator_strategy: How the originators are chosen, as in Ring.
+        """
+        # Nodes are reduced to their value, state and stage, so they have nowhere to keep a memory or a second channel
+        if not algorithm.unidirectional or algorithm.initial_memory() is not None:
+            raise Exception(f"{type(algorithm).__name__} needs channels in both directions or a memory in each node, "
+                            "which only a Ring has.")
+
+        self._values = values if isinstance(values, np.ndarray) else np.fromiter(values, dtype=np.int64)
+        # Use the smallest integer type that holds the values, as this array dominates the memory of the ring.
+        if len(self._values) and self._values.max() <= np.iinfo(np.int32).max:
+            self._values = self._values.astype(np.int32, copy=False)
+        self._states = np.full(len(self._values), STATE_CODES[State.ASLEEP], dtype=np.int8)
+        # The stage grows with the logarithm of the size of the ring, so 16 bits is plenty
+        self._stages = np.zeros(len(self._values), dtype=np.int16)
+
+        self._direction = direction
+        self._algorithm = algorithm
+        # This value will maintain the total number of messages we send
+        self._messages = 0
+        # The index of the leader, once it has been elected
+        self._leader = None
+
+        self.create_ring(number_of_originators=number_of_originators, seed=seed,
+                         originator_strategy=originator_strategy)
+
+    @classmethod
+    def random(cls, size, direction: Direction, algorithm: Algorithm, number_of_originators, seed=None):
+        """
+        Build a ring holding a random permutation of the values 1 to size. The permutation is shuffled in place,
+        so we only ever hold a single copy of the values.
+        """
+        values = np.arange(1, size + 1, dtype=np.int32 if size <= np.iinfo(np.int32).max else np.int64)
+        np.random.default_rng(seed).shuffle(values)
+        return cls(values, direction, algorithm, number_of_originators, seed=seed)
+
+    @classmethod
+    def generate(cls, size, ordering, direction: Direction, algorithm: Algorithm, number_of_originators, seed=None,
+                 originator_strategy="random"):
+        """
+        Build a ring holding the values 1 to size in one of the orderings of Generators.ORDERINGS. The values are
+        streamed straight into the array, so we only ever hold a single copy of them.
+        """
+        values = np.fromiter(generate_values(size, ordering, seed), count=size,
+                             dtype=np.int32 if size <= np.iinfo(np.int32).max else np.int64)
+        return cls(values, direction, algorithm, number_of_originators, seed=seed,
+                   originator_strategy=originator_strategy)
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def values(self):
+        return self._values
+
+    @property
+    def states(self):
+        return self._states
+
+    @property
+    def stages(self):
+        return self._stages
+
+    @property
+    def direction(self):
+        return self._direction
+
+    @property
+    def algorithm(self):
+        return self._algorithm
+
+    @property
+    def messages(self):
+        return self._messages
+
+    @property
+    def nbytes(self):
+        """
+        :return: The number of bytes used by the arrays of the ring.
+        """
+        return self._values.nbytes + self._states.nbytes + self._stages.nbytes
+
+    def state(self, index):
+        return STATES[self._states[index]]
+
+    def create_ring(self, number_of_originators, seed=None, originator_strategy="random"):
+        """
+        There are no links to set up, the neighbours of a node are the next and previous indices. So we only need
+        to choose the originators.
+        :return: None
+        """
+        if number_of_originators > len(self._values):
+            raise Exception("Number of originators is greater than the length of the list.")
+
+        if originator_strategy == "random":
+            # Drawing from NumPy avoids a Python int for every node of the ring
+            originators = np.random.default_rng(seed).choice(len(self._values), number_of_originators, replace=False)
+        else:
+            originators = choose_originators(self._values, number_of_originators, originator_strategy, seed)
+        self._states[originators] = STATE_CODES[State.ORIGINATOR]
+
+    def leader_election(self):
+        """
+        Deliver the messages in the order they were sent until no more messages are being sent.
+        Each originator has at most one message in flight at a time, so the queue of pending messages never
+        grows beyond the number of originators.
+        :return: The leader and the number of messages for this algorithm
+        """
+        values, states, stages = self._values, self._states, self._stages
+        act = self._algorithm.act
+        size = len(values)
+        step = 1 if self._direction == Direction.RIGHT else -1
+        originator = STATE_CODES[State.ORIGINATOR]
+        leader = STATE_CODES[State.LEADER]
+
+        # Pending deliveries as (receiver index, message). The originators wake up first.
+        pending = deque((index, None) for index in np.flatnonzero(states == originator).tolist())
+
+        def handle(index, incoming_message):
+            state, value, message = act(node_state=STATES[states[index]], node_value=int(values[index]),
+                                        node_stage=int(stages[index]), incoming_message=incoming_message)
+            code = STATE_CODES[state]
+            states[index] = code
+            values[index] = value
+            if code == leader:
+                self._leader = index
+            if message is not None:
+                stages[index] = message.stage
+                self._messages += 1
+                pending.append(((index + step) % size, message))
+            elif type(incoming_message) is ElectMessage:
+                # The chain of this message has ended, so it can be reused
+                ElectMessage.release(incoming_message)
+
+        while pending:
+            index, message = pending.popleft()
+
+            # An originator always wakes up before it handles its first message
+            if states[index] == originator:
+                handle(index, None)
+            if message is not None:
+                handle(index, message)
+
+        if self._leader is None:
+            raise Exception("The election finished without electing a leader.")
+        return int(values[self._leader]), self._messages
@@ -0,0 +1,270 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import time
+from array import array
+
+from State import State
+
+# Bump this whenever a change to the algorithms or engines changes the outcome of elections, or the format of traces
+# changes, so that results cached before the change are never returned
+CACHE_VERSION = 2
+
+
+def describe(value):
+    """
+    Describe a setting in a way that only depends on what it holds, so equal settings always hash the same.
+    Objects such as delay models are described by their class and attributes.
+    :param value: A setting of an engine.
+    :return: Something that can be written as JSON.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [describe(item) for item in value]
+    if isinstance(value, dict):
+        return sorted([describe(key), describe(item)] for key, item in value.items())
+    if hasattr(value, "__dict__"):
+        return [type(value).__name__, describe(vars(value))]
+    return repr(value)
+
+
+def election_key(algorithm, values, originators, direction, engine=None):
+    """
+    The address of an election in the cache. Two elections share a key only if everything that decides their outcome
+    is the same.
+    :param algorithm: The algorithm, or its class.
+    :param values: The values of the nodes before the election, from left to right.
+    :param originators: The indices of the originators.
+    :param direction: The direction messages are sent in.
+    :param engine: The engine running the election. None for the default threaded engine.
+    :return: A hexadecimal SHA-256 digest.
+    """
+    algorithm_class = algorithm if isinstance(algorithm, type) else type(algorithm)
+    engine_name = "ThreadedEngine" if engine is None else type(engine).__name__
+    settings = {} if engine is None else engine.settings()
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps([CACHE_VERSION, f"{algorithm_class.__module__}.{algorithm_class.__qualname__}",
+                              direction.value, engine_name, describe(settings)]).encode())
+    # The values and originators are hashed as packed integers, which is much faster than as text for large rings
+    digest.update(array("q", values).tobytes())
+    digest.update(b"|")
+    digest.update(array("q", originators).tobytes())
+    return digest.hexdigest()
+
+
+def ring_key(ring, engine=None):
+    """
+    :param ring: A ring that has not run its election yet, or has been reset.
+    :return: The key of the election of the ring with the given engine.
+    """
+    originators = [index for index, state in enumerate(ring.initial_states) if state == State.ORIGINATOR]
+    return election_key(ring.algorithm, ring.initial_values, originators, ring.direction, engine)
+
+
+class CachedResult:
+    """
+    An election read from the cache.
+    """
+    def __init__(self, leader, messages, measurements, trace):
+        self._leader = leader
+        self._messages = messages
+        self._measurements = measurements
+        self._trace = trace
+
+    @property
+    def leader(self):
+        return self._leader
+
+    @property
+    def messages(self):
+        return self._messages
+
+    @property
+    def measurements(self):
+        """
+        :return: A dictionary of anything else stored with the election, such as the number of rounds or the time.
+        """
+        return self._measurements
+
+    @property
+    def trace(self):
+        """
+        :return: The binary trace of the election, as written by Ring.save_trace, or None if none was stored.
+        """
+        return self._trace
+
+    def save_trace(self, path):
+        """
+        Write the stored trace to a file, so that Trace.TraceReader can open it.
+        :param path: The file to write to.
+        :return: None
+        """
+        if self._trace is None:
+            raise Exception("No trace was stored with this election.")
+        with open(path, "wb") as file:
+            file.write(self._trace)
+
+
+class ResultCache:
+    """
+    Keeps the outcome of elections on disk, addressed by election_key, so that sweeps can skip the elections they have
+    already run. The cache is a SQLite database in WAL mode. Any number of processes can read and write it at once,
+    each with its own ResultCache. Once the entries take more than max_bytes, the least recently used are evicted.
+    """
+    def __init__(self, path, max_bytes=256 * 2 ** 20):
+        """
+        :param path: The database file. Created if it does not exist.
+        :param max_bytes: The most bytes of results and traces to keep.
+        """
+        self._path = os.fspath(path)
+        self._max_bytes = max_bytes
+        # Writers wait for each other rather than fail, as several workers of a sweep may finish at the same time
+        self._connection = sqlite3.connect(self._path, timeout=60, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction():
+            self._connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, leader INTEGER, "
+                                     "messages INTEGER, measurements TEXT, trace BLOB, size INTEGER, used REAL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+            # The total size of the entries, kept up to date so that it never has to be summed
+            self._connection.execute("CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY, size INTEGER)")
+            self._connection.execute("INSERT OR IGNORE INTO totals VALUES (0, 0)")
+
+        self._hits = 0
+        self._misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def __contains__(self, key):
+        return self._connection.execute("SELECT 1 FROM results WHERE key = ?", (key,)).fetchone() is not None
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    @property
+    def size(self):
+        """
+        :return: The number of bytes taken by the entries.
+        """
+        return self._connection.execute("SELECT size FROM totals").fetchone()[0]
+
+    def _transaction(self):
+        # Take the write lock up front, so that two processes never both read the totals before either writes them
+        connection = self._connection
+
+        class Transaction:
+            def __enter__(self):
+                connection.execute("BEGIN IMMEDIATE")
+
+            def __exit__(self, exception_type, *exception):
+                connection.execute("COMMIT" if exception_type is None else "ROLLBACK")
+
+        return Transaction()
+
+    def get(self, key):
+        """
+        :param key: The key of the election, from election_key or ring_key.
+        :return: The CachedResult, or None if the election is not in the cache.
+        """
+        row = self._connection.execute("SELECT leader, messages, measurements, trace FROM results WHERE key = ?",
+                                       (key,)).fetchone()
+        if row is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._connection.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+        leader, messages, measurements, trace = row
+        return CachedResult(leader, messages, json.loads(measurements), trace)
+
+    def put(self, key, leader, messages, measurements=None, trace=None):
+        """
+        Store the outcome of an election, replacing whatever was stored under the same key. Evicts the least recently
+        used entries if the cache grows beyond max_bytes.
+        :param key: The key of the election, from election_key or ring_key.
+        :param leader: The value of the leader.
+        :param messages: The number of messages.
+        :param measurements: A dictionary of anything else to keep, that can be written as JSON.
+        :param trace: The binary trace of the election, as bytes.
+        :return: None
+        """
+        measurements = json.dumps(measurements or {})
+        size = len(key) + len(measurements) + (len(trace) if trace is not None else 0) + 16
+        if size > self._max_bytes:
+            return
+
+        with self._transaction():
+            old = self._connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            self._connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                     (key, leader, messages, measurements, trace, size, time.time()))
+            self._connection.execute("UPDATE totals SET size = size + ?", (size - (old[0] if old else 0),))
+            self._evict()
+
+    def _evict(self):
+        total = self._connection.execute("SELECT size FROM totals").fetchone()[0]
+        while total > self._max_bytes:
+            # Evict in batches, as looking up the oldest entries one at a time would be slow for large caches
+            rows = self._connection.execute("SELECT key, size FROM results ORDER BY used LIMIT 64").fetchall()
+            for key, size in rows:
+                if total <= self._max_bytes:
+                    break
+                self._connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                total -= size
+        self._connection.execute("UPDATE totals SET size = ?", (total,))
+
+    def clear(self):
+        with self._transaction():
+            self._connection.execute("DELETE FROM results")
+            self._connection.execute("UPDATE totals SET size = 0")
+
+    def close(self):
+        self._connection.close()
+
+    def election(self, ring, engine=None, trace=False):
+        """
+        Run the election of the ring, unless its outcome is already in the cache.
+        :param ring: A ring that has not run its election yet, or has been reset.
+        :param engine: The engine that runs the election.
+        :param trace: Whether to store the trace of the election. The ring must not be headless.
+        :return: (int, int, CachedResult) --> (leader, number of messages, the cached result or None if it was run)
+        """
+        if trace and ring.headless:
+            # Checked up front, as the trace could only be found missing once the election had run
+            raise ValueError("A headless ring records no trace to store.")
+        key = ring_key(ring, engine)
+        result = self.get(key)
+        if result is not None and (result.trace is not None or not trace):
+            return result.leader, result.messages, result
+
+        leader, messages = ring.leader_election(engine)
+        trace_bytes = None
+        if trace:
+            buffer = io.BytesIO()
+            ring.save_trace(buffer)
+            trace_bytes = buffer.getvalue()
+        self.put(key, leader, messages, trace=trace_bytes)
+        return leader, messages, None
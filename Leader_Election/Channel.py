@@ -0,0 +1,138 @@
+from collections import deque
+
+from Direction import Direction
+
+# Every field of a message is an integer sent as 8 bytes
+FIELD_SIZE = 8
+
+
+class MessageSizes(dict):
+    """
+    Maps each type of message onto the number of bytes it takes on the wire, 8 bytes for each of its fields.
+    The size of a type is worked out from its slots the first time we see it.
+    """
+    def __missing__(self, message_type):
+        fields = {field for cls in message_type.__mro__ for field in getattr(cls, "__slots__", ())}
+        size = self[message_type] = FIELD_SIZE * len(fields)
+        return size
+
+
+MESSAGE_SIZES = MessageSizes()
+
+
+def message_size(message):
+    """
+    :param message: The message being sent.
+    :return: The number of bytes the message takes on the wire.
+    """
+    return MESSAGE_SIZES[type(message)]
+
+
+class Channel:
+    """
+    A FIFO link carrying messages from a node to its neighbour in one direction. Messages are kept in a deque,
+    so sending and receiving are both O(1). The channel keeps count of the traffic it carries, so that hotspot links
+    can be found and buffers sized once the election is over.
+    """
+    # Channels are on the path of every message, so we use slots for faster attribute access.
+    # The queue is public so that receiving nodes can pop from it directly. Messages must be sent with push.
+    __slots__ = ("_source", "_target", "_direction", "_capacity", "_delay", "queue", "_messages", "_bytes",
+                 "_max_depth")
+
+    def __init__(self, source, target, direction: Direction, capacity=None, delay=1.0):
+        """
+        :param source: The node sending the messages.
+        :param target: The node receiving the messages.
+        :param direction: The direction the messages travel in.
+        :param capacity: The most messages the channel can hold at once. Unbounded if None.
+        :param delay: The time a message spends on the channel, used by the discrete event engine.
+        """
+        self._source = source
+        self._target = target
+        self._direction = direction
+        self._capacity = capacity
+        self._delay = delay
+        self.queue = deque()
+
+        # Statistics of the traffic on the channel
+        self._messages = 0
+        self._bytes = 0
+        self._max_depth = 0
+
+    def __len__(self):
+        return len(self.queue)
+
+    @property
+    def source(self):
+        return self._source
+
+    @property
+    def target(self):
+        return self._target
+
+    @property
+    def direction(self):
+        return self._direction
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def delay(self):
+        return self._delay
+
+    @property
+    def messages(self):
+        return self._messages
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    @property
+    def max_depth(self):
+        return self._max_depth
+
+    def push(self, message):
+        """
+        Send a message over the channel.
+        :param message: The message to send.
+        :return: None
+        """
+        queue = self.queue
+        if self._capacity is not None and len(queue) >= self._capacity:
+            raise Exception(f"The channel from node {self._source.index} to node {self._target.index} is full, "
+                            f"it can hold {self._capacity} messages.")
+
+        queue.append(message)
+        self._messages += 1
+        self._bytes += MESSAGE_SIZES[type(message)]
+        if len(queue) > self._max_depth:
+            self._max_depth = len(queue)
+
+    def pop(self):
+        """
+        :return: The oldest message on the channel, or None if the channel is empty.
+        """
+        try:
+            return self.queue.popleft()
+        except IndexError:
+            return None
+
+    def clear(self):
+        """
+        Drop every message on the channel and reset its statistics.
+        :return: None
+        """
+        self.queue.clear()
+        self._messages = 0
+        self._bytes = 0
+        self._max_depth = 0
+
+    def statistics(self):
+        """
+        :return: A dictionary describing the link, by the indices of its nodes, and the traffic it carried.
+        """
+        return {"source": self._source.index, "target": self._target.index, "direction": self._direction.value,
+                "messages": self._messages, "bytes": self._bytes, "max_depth": self._max_depth}
@@ -0,0 +1,55 @@
+from abc import ABC, abstractmethod
+from random import Random
+
+
+class DelayModel(ABC):
+    @abstractmethod
+    def delay(self, source: int, target: int, rng: Random):
+        """
+        This function decides how long a message takes to travel over a link.
+        :param source: The index of the node sending the message.
+        :param target: The index of the node receiving the message.
+        :param rng: The seeded random number generator of the engine. Use this rather than the random module,
+        so that runs can be reproduced.
+        :return: (float) The time the message spends on the link.
+        """
+        pass
+
+
+class ConstantDelay(DelayModel):
+    def __init__(self, delay: float = 1.0):
+        self._delay = delay
+
+    def delay(self, source: int, target: int, rng: Random):
+        return self._delay
+
+
+class UniformDelay(DelayModel):
+    def __init__(self, low: float = 0.0, high: float = 1.0):
+        self._low = low
+        self._high = high
+
+    def delay(self, source: int, target: int, rng: Random):
+        return rng.uniform(self._low, self._high)
+
+
+class ExponentialDelay(DelayModel):
+    def __init__(self, mean: float = 1.0):
+        self._rate = 1.0 / mean
+
+    def delay(self, source: int, target: int, rng: Random):
+        return rng.expovariate(self._rate)
+
+
+class LinkDelay(DelayModel):
+    def __init__(self, links: dict, default: DelayModel = None):
+        """
+        Use a different delay model for some of the links.
+        :param links: Maps (source, target) pairs of node indices onto the delay model for that link.
+        :param default: The delay model used for every other link.
+        """
+        self._links = links
+        self._default = ConstantDelay() if default is None else default
+
+    def delay(self, source: int, target: int, rng: Random):
+        return self._links.get((source, target), self._default).delay(source, target, rng)
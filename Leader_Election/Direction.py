@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class Direction(Enum):
+    LEFT = "Left"
+    RIGHT = "Right"
+
+    @property
+    def opposite(self):
+        return Direction.RIGHT if self is Direction.LEFT else Direction.LEFT
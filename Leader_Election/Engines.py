@@ -0,0 +1,370 @@
+from abc import ABC, abstractmethod
+from heapq import heappush, heappop, merge
+from itertools import count
+from random import Random
+from threading import Thread, Lock
+from time import perf_counter_ns
+
+from Delays import DelayModel
+from Direction import Direction
+from EventLog import EventLog
+from Message import WakeUpMessage
+from State import State
+
+
+class Engine(ABC):
+    @abstractmethod
+    def run(self, ring):
+        """
+        Execute the election on the given ring.
+        :param ring: The ring we are running the election on.
+        :return: (int, int) --> (leader, number of messages)
+        """
+        pass
+
+    def settings(self):
+        """
+        :return: A dictionary of the settings the engine was created with that can change the outcome of an
+        election, such as a seed. Used to tell elections apart, for example by Cache.ResultCache.
+        """
+        return {}
+
+
+class ThreadedEngine(Engine):
+    def run(self, ring):
+        """
+        Each thread begins at an originator and follows its messages around the ring until no more messages are being
+        sent. A node is run by a single thread at a time: the thread that sends a message to a node nobody is running
+        takes the node over, and otherwise leaves the message for the thread running it. So no two threads ever handle
+        messages at the same node, without a lock being held while they do.
+        Each thread counts its messages and buffers its events on its own, and these are merged once every thread has
+        joined. The totals are exact, and the threads share nothing but a lock per node, which is taken for every
+        message sent, to hand it over to its receiver, and when a thread finds a node with nothing left to handle.
+        If a thread raises, the first error is raised again once every thread has joined.
+        """
+        nodes = ring.nodes
+        algorithm = ring.algorithm
+        direction = ring.direction
+        headless = ring.headless
+
+        # Whether a thread is running each node, guarded by the lock of the node
+        locks = [Lock() for _ in nodes]
+        running = [False] * len(nodes)
+        # The time of the last event of each node. Only written by the thread running the node.
+        last_event = [0] * len(nodes)
+        # What each thread found: (leader, number of messages, events)
+        results = []
+        # The errors raised by the threads
+        errors = []
+
+        def work(start):
+            leader, messages, events = None, 0, []
+
+            def record(node, state, value, receiver=EventLog.NO_RECEIVER, message_value=0):
+                # Events are ordered by time when they are merged. Taking the time before the message is sent puts
+                # every send before its receive, and each node's events are kept in order.
+                time = last_event[node.index] = max(perf_counter_ns(), last_event[node.index] + 1)
+                events.append((time, node.index, state, node.state, value, node.value, node.stage, receiver,
+                               message_value))
+
+            try:
+                # The nodes this thread has taken over and has yet to run
+                owned = [start]
+                while owned:
+                    node = owned.pop()
+                    index = node.index
+                    while True:
+                        # An originator always wakes up before it handles its first message
+                        if node.state == State.ORIGINATOR:
+                            message = None
+                        else:
+                            message = node.receive()
+                            if message is None:
+                                with locks[index]:
+                                    # A message may have arrived since we looked
+                                    message = node.receive()
+                                    if message is None:
+                                        running[index] = False
+                                        break
+
+                        state, value = node.state, node.value
+                        outgoing = node.handle(algorithm, message)
+                        if node.state == State.LEADER:
+                            leader = node
+                        if outgoing is None:
+                            if not headless:
+                                record(node, state, value)
+                            continue
+                        if type(outgoing) is not list:
+                            outgoing = ((outgoing, direction),)
+
+                        for message, towards in outgoing:
+                            receiver = node.right if towards is Direction.RIGHT else node.left
+                            if not headless:
+                                record(node, state, value, receiver.index, message.value)
+                                state, value = node.state, node.value
+                            node.send(message, towards)
+                            messages += 1
+
+                            # Leave the message to the thread running the receiver, or take the receiver over if
+                            # there is no such thread
+                            target = receiver.index
+                            with locks[target]:
+                                claimed = not running[target]
+                                running[target] = True
+                            if claimed:
+                                owned.append(receiver)
+            except Exception as exception:
+                # Otherwise only threading's excepthook would hear of it, and run would blame the missing leader
+                errors.append(exception)
+                return
+
+            # Appending to a list is atomic, with or without the GIL
+            results.append((leader, messages, events))
+
+        # Every originator is taken over by its own thread before any thread starts
+        originators = [node for node in nodes if node.state == State.ORIGINATOR]
+        for node in originators:
+            running[node.index] = True
+        thread_pool = [Thread(target=work, args=(node, )) for node in originators]
+
+        # Starting all the threads
+        for thread in thread_pool:
+            thread.start()
+
+        # Joining all the threads
+        for thread in thread_pool:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+        leader = next((leader for leader, _, _ in results if leader is not None), None)
+        ring.record_result(leader, sum(messages for _, messages, _ in results))
+        if not headless:
+            for event in merge(*(events for _, _, events in results)):
+                ring.event_log.record(*event[1:])
+
+        return ring.leader().value, ring.messages
+
+
+class DiscreteEventEngine(Engine):
+    def __init__(self, delay_model: DelayModel = None, seed=None):
+        """
+        A single threaded engine. Every message is scheduled to arrive after a delay decided by the delay model,
+        and the messages are delivered in order of arrival. With the same seed the run is fully reproducible.
+        :param delay_model: Decides how long each message spends on its link. By default, the delay of the channel.
+        :param seed: The seed for the random number generator passed to the delay model.
+        """
+        self._delay_model = delay_model
+        self._seed = seed
+        # The time at which the last message was delivered
+        self._time = 0.0
+
+    @property
+    def time(self):
+        return self._time
+
+    def settings(self):
+        return {"delay_model": self._delay_model, "seed": self._seed}
+
+    def run(self, ring):
+        rng = Random(self._seed)
+        nodes = ring.nodes
+
+        # The event queue holds (arrival time, sequence number, receiver index, channel). The message itself waits
+        # on the channel, and the channel is None when an originator wakes up.
+        # The sequence number breaks ties, so that events at the same time are handled in the order they were created.
+        queue = []
+        sequence = count()
+        # Arrival time of the last message on each channel. Messages cannot overtake each other on the same channel.
+        channel_clock = {}
+
+        def deliver(node, message, time):
+            for _, channel in ring.deliver(node, message):
+                delay = channel.delay if self._delay_model is None else \
+                    self._delay_model.delay(node.index, channel.target.index, rng)
+                arrival = max(time + delay, channel_clock.get(channel, 0.0))
+                channel_clock[channel] = arrival
+                heappush(queue, (arrival, next(sequence), channel.target.index, channel))
+
+        # Every originator wakes up at the start of the run
+        for node in nodes:
+            if node.state == State.ORIGINATOR:
+                heappush(queue, (0.0, next(sequence), node.index, None))
+
+        while queue:
+            self._time, _, index, channel = heappop(queue)
+            node = nodes[index]
+
+            # An originator always wakes up before it handles its first message
+            if node.state == State.ORIGINATOR:
+                deliver(node, None, self._time)
+            if channel is not None:
+                deliver(node, channel.pop(), self._time)
+
+        return ring.leader().value, ring.messages
+
+
+class RoundStatistics:
+    """
+    The time complexity of a synchronous election, measured in rounds, next to its messages.
+    """
+    def __init__(self):
+        # The round in which the leader was elected
+        self.rounds_to_leader = None
+        # The number of messages sent in each round. Round 0 is when the originators wake up.
+        self.messages_per_round = []
+        # The number of nodes that were candidates in each stage
+        self.candidates_per_stage = {}
+
+    @property
+    def rounds(self):
+        """
+        :return: The number of rounds in which messages were sent, until no message was left.
+        """
+        return len(self.messages_per_round)
+
+    def as_dict(self):
+        return {"rounds": self.rounds, "rounds_to_leader": self.rounds_to_leader,
+                "messages_per_round": list(self.messages_per_round),
+                "candidates_per_stage": dict(sorted(self.candidates_per_stage.items()))}
+
+
+class SynchronousEngine(Engine):
+    def __init__(self):
+        """
+        A single threaded engine that runs the election in synchronous rounds. Every message sent in a round is
+        delivered, all together, in the next round. Alongside the number of messages, this measures how many rounds
+        the election takes, which is available from statistics once the run is over.
+        """
+        self._statistics = None
+
+    @property
+    def statistics(self):
+        return self._statistics
+
+    def run(self, ring):
+        statistics = self._statistics = RoundStatistics()
+        nodes = ring.nodes
+        candidates = statistics.candidates_per_stage
+
+        # The deliveries of the current round and of the next, as (receiver, channel). The channel is None when an
+        # originator wakes up.
+        current = [(node, None) for node in nodes if node.state == State.ORIGINATOR]
+        following = []
+
+        def deliver(node, message):
+            state, stage = node.state, node.stage
+            sent = ring.deliver(node, message)
+            if node.state == State.CANDIDATE and (state != State.CANDIDATE or node.stage != stage):
+                candidates[node.stage] = candidates.get(node.stage, 0) + 1
+            if node.state == State.LEADER and statistics.rounds_to_leader is None:
+                statistics.rounds_to_leader = statistics.rounds
+            following.extend((channel.target, channel) for _, channel in sent)
+
+        while current:
+            for node, channel in current:
+                # An originator always wakes up before it handles its first message
+                if node.state == State.ORIGINATOR:
+                    deliver(node, None)
+                if channel is not None:
+                    deliver(node, channel.pop())
+
+            statistics.messages_per_round.append(len(following))
+            current, following = following, []
+
+        # The last round only delivered messages, without sending any
+        if statistics.messages_per_round and statistics.messages_per_round[-1] == 0:
+            statistics.messages_per_round.pop()
+
+        return ring.leader().value, ring.messages
+
+
+class AsyncEngine(Engine):
+    def __init__(self, wake_up_spread=0.0, seed=None):
+        """
+        Every node runs as its own asyncio task, waiting on an inbox for messages to arrive. The originators are
+        woken up by a WakeUpMessage, each at its own random time, so they start truly asynchronously.
+        :param wake_up_spread: The originators wake up at a random time between 0 and this many seconds.
+        :param seed: The seed for the random wake up times.
+        """
+        self._wake_up_spread = wake_up_spread
+        self._seed = seed
+
+    def run(self, ring):
+        """
+        Runs the election in a new event loop. From code that is already running in an event loop, such as a
+        notebook, await run_async instead.
+        """
+        # asyncio takes longer to import than the rest of the election code, so only engines that use it import it
+        import asyncio
+        return asyncio.run(self.run_async(ring))
+
+    def settings(self):
+        return {"wake_up_spread": self._wake_up_spread, "seed": self._seed}
+
+    async def run_async(self, ring):
+        import asyncio
+        rng = Random(self._seed)
+        nodes = ring.nodes
+        loop = asyncio.get_running_loop()
+
+        # The inbox of each node holds the channels a message is waiting on, or a WakeUpMessage. Channels are FIFO,
+        # so taking the oldest message from the channel keeps the messages in order.
+        inboxes = [asyncio.Queue() for _ in nodes]
+        # The number of wake ups and messages that have not been handled yet. The election is over when it reaches 0.
+        remaining = 0
+        finished = asyncio.Event()
+
+        def deliver(node, message):
+            nonlocal remaining
+            for _, channel in ring.deliver(node, message):
+                remaining += 1
+                inboxes[channel.target.index].put_nowait(channel)
+
+        # The first error raised by a node. It ends the election, rather than leaving the other nodes waiting.
+        failures = []
+
+        async def node_task(node, inbox):
+            nonlocal remaining
+            while True:
+                item = await inbox.get()
+                try:
+                    if type(item) is WakeUpMessage:
+                        # The node may already have woken up when its first message arrived
+                        if node.state == State.ORIGINATOR:
+                            deliver(node, item)
+                    else:
+                        # An originator always wakes up before it handles its first message
+                        if node.state == State.ORIGINATOR:
+                            deliver(node, WakeUpMessage(None))
+                        deliver(node, item.queue.popleft())
+                except Exception as exception:
+                    failures.append(exception)
+                    finished.set()
+                    return
+
+                remaining -= 1
+                if remaining == 0:
+                    finished.set()
+
+        tasks = [asyncio.create_task(node_task(node, inbox)) for node, inbox in zip(nodes, inboxes)]
+
+        # Schedule the wake up of every originator
+        for node in nodes:
+            if node.state == State.ORIGINATOR:
+                remaining += 1
+                loop.call_later(rng.uniform(0, self._wake_up_spread), inboxes[node.index].put_nowait,
+                                WakeUpMessage(None))
+
+        try:
+            if remaining > 0:
+                await finished.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if failures:
+            raise failures[0]
+        return ring.leader().value, ring.messages
@@ -0,0 +1,136 @@
+from array import array
+from State import State
+
+# States are stored by their position in this tuple, so that every record is made up only of integers.
+STATES = tuple(State)
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+
+
+class EventLog:
+    """
+    Append-only log of the changes that each delivered message makes to the ring.
+    Rather than copying every node after every message, we only keep the initial labels and colours of the ring and
+    one fixed-width record per step. Any frame of the animation can then be rebuilt on demand by replaying the log.
+    """
+    # Layout of a record: acting node, old state, new state, old value, new value, stage, receiver, message value
+    RECORD_WIDTH = 8
+    # Receiver used when the step did not deliver a message
+    NO_RECEIVER = -1
+
+    def __init__(self, values: [int], states: [State]):
+        self._initial_values = list(values)
+        self._initial_states = [STATE_CODES[state] for state in states]
+        # All the records are packed one after the other into a single array of 64-bit integers
+        self._records = array('q')
+
+        # The frame we last rebuilt. Replaying from here keeps sequential access O(1) per frame.
+        self._frame_index = 0
+        self._frame_values = list(self._initial_values)
+        self._frame_states = list(self._initial_states)
+
+    def __len__(self):
+        """
+        :return: The number of frames in the log. One for the initial state and one for each recorded step.
+        """
+        return len(self._records) // self.RECORD_WIDTH + 1
+
+    @property
+    def records(self):
+        return self._records
+
+    @property
+    def initial_values(self):
+        return self._initial_values
+
+    @property
+    def initial_states(self):
+        return [STATES[code] for code in self._initial_states]
+
+    def record(self, index: int, old_state: State, new_state: State, old_value: int, new_value: int, stage: int,
+               receiver: int = NO_RECEIVER, message_value: int = 0):
+        """
+        Append the changes made by a single step to the log.
+        :param index: The index of the node that acted.
+        :param old_state: The state of the node before it acted.
+        :param new_state: The state of the node after it acted.
+        :param old_value: The value of the node before it acted.
+        :param new_value: The value of the node after it acted.
+        :param stage: The stage of the node after it acted.
+        :param receiver: The index of the node the message was delivered to. NO_RECEIVER if no message was sent.
+        :param message_value: The value carried by the delivered message.
+        :return: None
+        """
+        # A single extend keeps each record contiguous, even when several threads are recording at once.
+        self._records.extend((index, STATE_CODES[old_state], STATE_CODES[new_state], old_value, new_value, stage,
+                              receiver, message_value))
+
+    def step(self, frame: int):
+        """
+        :param frame: The frame we want the step for. Frame 0 is the initial state and has no step.
+        :return: The record that produced the given frame as a tuple.
+        """
+        start = (frame - 1) * self.RECORD_WIDTH
+        return tuple(self._records[start:start + self.RECORD_WIDTH])
+
+    def steps(self):
+        """
+        Iterate over the records in the order they were logged, without copying the log.
+        :return: A generator of record tuples. The record at position k produced frame k + 1.
+        """
+        records, width = self._records, self.RECORD_WIDTH
+        for start in range(0, len(records), width):
+            yield tuple(records[start:start + width])
+
+    def frame(self, frame: int):
+        """
+        Rebuild the ring as it was at the given frame. We replay the log forwards or backwards from the last frame
+        we rebuilt, so walking through the frames in order costs O(1) per frame.
+        :param frame: The index of the frame, between 0 and len(self) - 1.
+        :return: (list, list) --> (node values, node states)
+        """
+        if not 0 <= frame < len(self):
+            raise Exception(f"Frame {frame} is outside of the log, which has {len(self)} frames.")
+
+        records, width = self._records, self.RECORD_WIDTH
+        values, states = self._frame_values, self._frame_states
+
+        # Move forwards by applying the new state and value of each step
+        while self._frame_index < frame:
+            start = self._frame_index * width
+            index = records[start]
+            states[index] = records[start + 2]
+            values[index] = records[start + 4]
+            self._frame_index += 1
+
+        # Move backwards by restoring the old state and value of each step
+        while self._frame_index > frame:
+            self._frame_index -= 1
+            start = self._frame_index * width
+            index = records[start]
+            states[index] = records[start + 1]
+            values[index] = records[start + 3]
+
+        return list(values), [STATES[code] for code in states]
+
+    def caption(self, frame: int):
+        """
+        :param frame: The index of the frame.
+        :return: A description of what happened in the given frame.
+        """
+        if frame == 0:
+            return "Initial state"
+
+        values, _ = self.frame(frame)
+        return self.describe(self.step(frame), values)
+
+    @classmethod
+    def describe(cls, step, values):
+        """
+        :param step: A record of the log.
+        :param values: The values of the nodes once the step has been applied.
+        :return: A description of what happened in the step.
+        """
+        index, _, _, _, _, _, receiver, message_value = step
+        if receiver == cls.NO_RECEIVER:
+            return f"The node {values[index]} has received no message"
+        return f"The node {values[receiver]} has received the message {message_value}"
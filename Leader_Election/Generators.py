@@ -0,0 +1,220 @@
+import random
+from heapq import nlargest, nsmallest
+from random import Random
+
+# Values are generated lazily, one at a time, so a ring can be filled straight from a generator without ever holding
+# a second copy of its values. Every ordering produces each of the values 1 to size exactly once, from left to right.
+
+
+def sorted_values(size, seed=None):
+    return iter(range(1, size + 1))
+
+
+def reverse_sorted_values(size, seed=None):
+    return iter(range(size, 0, -1))
+
+
+def zig_zag_values(size, seed=None):
+    """
+    The smallest and largest values that remain, one after the other: 1, n, 2, n - 1, ... Every node is a local
+    minimum or maximum, so candidates of both parities are defeated as early as possible.
+    """
+    low, high = 1, size
+    while low <= high:
+        yield low
+        if low != high:
+            yield high
+        low, high = low + 1, high - 1
+
+
+def bit_reversal_values(size, seed=None):
+    """
+    The value at each position is its index with the bits reversed, skipping the indices that are too large.
+    Neighbouring values end up far apart, and every arc of the ring holds values from across the whole range.
+    """
+    bits = max(1, (size - 1).bit_length())
+    for index in range(1 << bits):
+        value = int(format(index, f"0{bits}b")[::-1], 2)
+        if value < size:
+            yield value + 1
+
+
+class FeistelPermutation:
+    """
+    A seeded random permutation of range(size) that is computed one value at a time, so it never has to be held in
+    memory. A balanced Feistel network is a permutation of the smallest power of four covering size. Values that land
+    outside of range(size) are encrypted again until they fall inside it, fewer than four times on average.
+    """
+    ROUNDS = 4
+
+    def __init__(self, size, seed=None):
+        self._size = size
+        self._half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self._mask = (1 << self._half_bits) - 1
+        rng = Random(seed)
+        self._keys = [rng.getrandbits(64) | 1 for _ in range(self.ROUNDS)]
+
+    def __len__(self):
+        return self._size
+
+    def _round(self, half, key):
+        # Any function of the half and key will do, this one mixes the bits well and is cheap in Python
+        half = (half * key) & 0xFFFFFFFFFFFFFFFF
+        return (half ^ (half >> 29)) & self._mask
+
+    def _encrypt(self, index):
+        left, right = index >> self._half_bits, index & self._mask
+        for key in self._keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << self._half_bits) | right
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._size:
+            raise IndexError(f"Index {index} is outside of a permutation of {self._size} values.")
+        value = self._encrypt(index)
+        while value >= self._size:
+            value = self._encrypt(value)
+        return value
+
+    def __iter__(self):
+        return (self[index] for index in range(self._size))
+
+
+def random_values(size, seed=None):
+    """
+    A random permutation, drawn from the seed. Unlike shuffling a list, the values are computed as they are needed.
+    """
+    return (value + 1 for value in FeistelPermutation(size, seed))
+
+
+def max_stages_values(size, seed=None):
+    """
+    An ordering that keeps MinMax going for as many stages as possible when every node is an originator and messages
+    travel right. Exactly ceil(k / 2) of the k candidates of each stage survive it, so a single candidate is only left
+    after ceil(log2(size)) stages. For messages travelling left, reverse it.
+
+    The ring is built backwards from the leader. Each expansion takes the values held by the candidates of a stage and
+    finds a ring for the stage before it, in which every candidate that survives is handed the value it will hold.
+    A candidate of an odd stage survives if the value it receives is smaller than its own, and of an even stage if it
+    is larger. Unlike the other orderings, this one holds all of its values while it is being built.
+    """
+    counts = []
+    while size > 1:
+        counts.append(size)
+        size = (size + 1) // 2
+
+    survivors = [0.0]
+    for stage, count in reversed(list(enumerate(counts, start=1))):
+        survivors = _expand(survivors, count, odd=stage % 2 == 1)
+
+    # Replace the placeholders by the values 1 to size, in the same order
+    ranks = sorted(range(len(survivors)), key=survivors.__getitem__)
+    values = [0] * len(survivors)
+    for rank, index in enumerate(ranks, start=1):
+        values[index] = rank
+    return iter(values)
+
+
+def _expand(survivors, count, odd):
+    """
+    :param survivors: The values held by the candidates of the next stage, in order around the ring.
+    :param count: The number of candidates of this stage, either twice the number of survivors or one less.
+    :param odd: Whether this stage is odd, in which candidates keep the smaller values.
+    :return: The values of the candidates of this stage, as placeholders that only need to keep their order.
+    """
+    # Work on ranks, so that a new value can always be squeezed in between two others
+    order = sorted(range(len(survivors)), key=survivors.__getitem__)
+    ranks = [0] * len(survivors)
+    for rank, index in enumerate(order):
+        ranks[index] = float(rank)
+
+    size = len(ranks)
+    better = max if odd else min
+    # Keep new values apart from each other, and strictly between two neighbouring ranks
+    offset = 0.4 / (2 * size + 1)
+
+    if count == 2 * size - 1:
+        # One candidate must pass on a value it received to a second survivor, which needs the survivors to
+        # rise (odd) or fall (even) from one to the next. There is always such a pair in a ring.
+        start = next(index for index in range(size)
+                     if (ranks[(index + 1) % size] > ranks[index]) == odd)
+        ranks = ranks[start:] + ranks[:start]
+
+    values = []
+    index = 0
+    while index < size:
+        following = ranks[(index + 1) % size]
+        if count == 2 * size - 1 and index == 0:
+            # The first candidate hands its value to the second, which hands its own to the third.
+            # The third must beat both the value after it and the one it receives.
+            after = ranks[(index + 2) % size]
+            values.extend([ranks[index], following])
+            extra = better(following, after)
+            index += 2
+        else:
+            values.append(ranks[index])
+            extra = better(ranks[index], following)
+            index += 1
+        # The new candidate survives with the value before it, and defeats the candidate after it
+        values.append(extra + (0.5 + offset * len(values)) * (1 if odd else -1))
+    return values
+
+
+ORDERINGS = {"random": random_values, "sorted": sorted_values, "reverse_sorted": reverse_sorted_values,
+             "zig_zag": zig_zag_values, "bit_reversal": bit_reversal_values, "max_stages": max_stages_values}
+
+
+def generate_values(size, ordering="random", seed=None):
+    """
+    :param size: The number of nodes in the ring.
+    :param ordering: The name of an ordering in ORDERINGS, or a function taking the size and seed.
+    :param seed: The seed of the random orderings.
+    :return: An iterator over the values 1 to size, from left to right.
+    """
+    generate = ORDERINGS[ordering] if isinstance(ordering, str) else ordering
+    return generate(size, seed)
+
+
+# Each strategy takes the values of the ring, the number of originators and a random number generator, and returns
+# the indices of the originators.
+
+def random_originators(values, number, rng):
+    return rng.sample(range(len(values)), number)
+
+
+def spread_originators(values, number, rng):
+    # As evenly spaced around the ring as possible
+    return [index * len(values) // number for index in range(number)]
+
+
+def contiguous_originators(values, number, rng):
+    return range(number)
+
+
+def largest_originators(values, number, rng):
+    return nlargest(number, range(len(values)), key=values.__getitem__)
+
+
+def smallest_originators(values, number, rng):
+    return nsmallest(number, range(len(values)), key=values.__getitem__)
+
+
+ORIGINATOR_STRATEGIES = {"random": random_originators, "spread": spread_originators,
+                         "contiguous": contiguous_originators, "largest": largest_originators,
+                         "smallest": smallest_originators}
+
+
+def choose_originators(values, number, strategy="random", seed=None):
+    """
+    :param values: The values of the ring, from left to right.
+    :param number: The number of originators.
+    :param strategy: The name of a strategy in ORIGINATOR_STRATEGIES, or a function taking the values, the number of
+    originators and a random number generator.
+    :param seed: The seed of the random strategies. If None, the global random module is used, so that seeding it
+    chooses the same originators as before strategies existed.
+    :return: The indices of the originators.
+    """
+    if number > len(values):
+        raise Exception("Number of originators is greater than the length of the list.")
+    choose = ORIGINATOR_STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+    return list(choose(values, number, random if seed is None else Random(seed)))
@@ -0,0 +1,230 @@
+import json
+import threading
+import time
+from collections import Counter
+
+from Message import WakeUpMessage
+from State import State
+
+
+class Hooks:
+    """
+    Receives the events of an election. Every method does nothing, so a sink only overrides the events it needs.
+    Hooks are attached to a ring with Ring.instrument. Rings without hooks never call them, so they cost nothing.
+    """
+    def on_receive(self, node, message):
+        """
+        A node has been handed a message.
+        """
+
+    def on_send(self, node, receiver, message):
+        """
+        A node has sent a message to its neighbour.
+        """
+
+    def on_state_change(self, node, old_state: State, new_state: State):
+        """
+        A node has moved to another state.
+        """
+
+    def on_stage_change(self, node, old_stage: int, new_stage: int):
+        """
+        A node has moved to another stage.
+        """
+
+    def on_leader_elected(self, node):
+        """
+        A node has been elected leader.
+        """
+
+    def handled(self, node, message, old_state: State, old_stage: int):
+        """
+        Called by Node.handle once a node has handled a message, to fire the events it caused.
+        :param node: The node, already updated.
+        :param message: The message it handled. None, or a WakeUpMessage, when an originator wakes up.
+        :param old_state: The state of the node before it handled the message.
+        :param old_stage: The stage of the node before it handled the message.
+        :return: None
+        """
+        # Waking up is not counted as receiving a message, whichever way the engine wakes the originators
+        if message is not None and type(message) is not WakeUpMessage:
+            self.on_receive(node, message)
+        if node.state != old_state:
+            self.on_state_change(node, old_state, node.state)
+            if node.state == State.LEADER:
+                self.on_leader_elected(node)
+        if node.stage != old_stage:
+            self.on_stage_change(node, old_stage, node.stage)
+
+
+class Broadcast(Hooks):
+    """
+    Passes every event on to several sinks, in order.
+    """
+    def __init__(self, sinks: [Hooks]):
+        self._sinks = list(sinks)
+
+    @property
+    def sinks(self):
+        return self._sinks
+
+    def on_receive(self, node, message):
+        for sink in self._sinks:
+            sink.on_receive(node, message)
+
+    def on_send(self, node, receiver, message):
+        for sink in self._sinks:
+            sink.on_send(node, receiver, message)
+
+    def on_state_change(self, node, old_state, new_state):
+        for sink in self._sinks:
+            sink.on_state_change(node, old_state, new_state)
+
+    def on_stage_change(self, node, old_stage, new_stage):
+        for sink in self._sinks:
+            sink.on_stage_change(node, old_stage, new_stage)
+
+    def on_leader_elected(self, node):
+        for sink in self._sinks:
+            sink.on_leader_elected(node)
+
+
+class Counters(Hooks):
+    """
+    Counts the messages sent and received per stage and per node, and the transitions between states.
+    Nodes are counted by their index in the ring, as their values change during an election.
+    """
+    def __init__(self):
+        # Several threads may send at once in the threaded engine
+        self._lock = threading.Lock()
+        self.sent_per_stage = Counter()
+        self.sent_per_node = Counter()
+        self.received_per_node = Counter()
+        self.transitions = Counter()
+        # The nodes that reached each stage
+        self.nodes_per_stage = Counter()
+        self.leader = None
+
+    def on_receive(self, node, message):
+        with self._lock:
+            self.received_per_node[node.index] += 1
+
+    def on_send(self, node, receiver, message):
+        with self._lock:
+            self.sent_per_stage[getattr(message, "stage", None)] += 1
+            self.sent_per_node[node.index] += 1
+
+    def on_state_change(self, node, old_state, new_state):
+        with self._lock:
+            self.transitions[old_state, new_state] += 1
+
+    def on_stage_change(self, node, old_stage, new_stage):
+        with self._lock:
+            self.nodes_per_stage[new_stage] += 1
+
+    def on_leader_elected(self, node):
+        self.leader = node.index
+
+    @staticmethod
+    def histogram(counts: Counter):
+        """
+        :param counts: A counter per node, such as sent_per_node.
+        :return: A dictionary mapping each count onto the number of nodes with that count, in increasing order.
+        Nodes that were never counted are not included.
+        """
+        return dict(sorted(Counter(counts.values()).items()))
+
+    def summary(self):
+        """
+        :return: The counters as a dictionary that can be written as JSON.
+        """
+        return {"sent_per_stage": {str(stage): count for stage, count in sorted(self.sent_per_stage.items(),
+                                                                               key=lambda item: str(item[0]))},
+                "nodes_per_stage": dict(sorted(self.nodes_per_stage.items())),
+                "sent_per_node_histogram": self.histogram(self.sent_per_node),
+                "received_per_node_histogram": self.histogram(self.received_per_node),
+                "transitions": {f"{old.value} -> {new.value}": count for (old, new), count in self.transitions.items()},
+                "leader": self.leader}
+
+
+class ChromeTrace(Hooks):
+    """
+    Records the events of an election in the trace event format of Chrome, which chrome://tracing and
+    https://ui.perfetto.dev can open. Every node is shown as its own thread, and each message as an arrow from the
+    node that sent it to the node that received it.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start = time.perf_counter_ns()
+        # Events are kept as tuples while recording, and only turned into dictionaries on export
+        self._events = []
+        # The flow of each message in flight, by the identity of the message
+        self._flows = {}
+        self._next_flow = 0
+        self._names = {}
+
+    def _timestamp(self):
+        # The trace event format counts in microseconds
+        return (time.perf_counter_ns() - self._start) / 1000
+
+    def on_receive(self, node, message):
+        with self._lock:
+            flow = self._flows.pop(id(message), None)
+            self._names.setdefault(node.index, node.value)
+            self._events.append(("receive", self._timestamp(), node.index, flow, message.value,
+                                 getattr(message, "stage", None)))
+
+    def on_send(self, node, receiver, message):
+        with self._lock:
+            flow = self._flows[id(message)] = self._next_flow
+            self._next_flow += 1
+            self._names.setdefault(node.index, node.value)
+            self._events.append(("send", self._timestamp(), node.index, flow, message.value,
+                                 getattr(message, "stage", None)))
+
+    def on_state_change(self, node, old_state, new_state):
+        with self._lock:
+            self._events.append(("state", self._timestamp(), node.index, None, old_state.value, new_state.value))
+
+    def on_stage_change(self, node, old_stage, new_stage):
+        with self._lock:
+            self._events.append(("stage", self._timestamp(), node.index, None, old_stage, new_stage))
+
+    def on_leader_elected(self, node):
+        with self._lock:
+            self._events.append(("leader", self._timestamp(), node.index, None, node.value, None))
+
+    def __len__(self):
+        return len(self._events)
+
+    def trace_events(self):
+        """
+        :return: A generator of the recorded events, as dictionaries in the trace event format.
+        """
+        for index, value in sorted(self._names.items()):
+            yield {"name": "thread_name", "ph": "M", "pid": 0, "tid": index, "args": {"name": f"node {value}"}}
+
+        for name, timestamp, index, flow, first, second in self._events:
+            event = {"name": name, "ph": "i", "s": "t", "ts": timestamp, "pid": 0, "tid": index}
+            if name in ("send", "receive"):
+                event["args"] = {"value": first, "stage": second}
+            elif name in ("state", "stage"):
+                event["args"] = {"from": first, "to": second}
+            else:
+                event["s"] = "g"
+                event["args"] = {"value": first}
+            yield event
+
+            # Draw an arrow from the send to the receive of each message
+            if flow is not None:
+                yield {"name": "message", "cat": "message", "ph": "s" if name == "send" else "f", "bp": "e",
+                       "id": flow, "ts": timestamp, "pid": 0, "tid": index}
+
+    def export(self, path):
+        """
+        Write the trace to a JSON file.
+        :param path: The file to write to.
+        :return: None
+        """
+        with open(path, "w") as file:
+            json.dump({"traceEvents": list(self.trace_events()), "displayTimeUnit": "ns"}, file)
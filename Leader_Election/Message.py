@@ -1,50 +1,114 @@
-from abc import ABC
+class Message:
+    # Messages only hold plain fields, so we use slots. This saves the dictionary of every message, and the fields
+    # are read and written directly rather than through properties.
+    __slots__ = ("value",)
 
-
-class Message(ABC):
     def __init__(self, value):
-        self._value = value
-
-    @property
-    def value(self):
-        return self._value
-
-    @value.setter
-    def value(self, value):
-        self._value = value
+        self.value = value
 
     def __str__(self):
-        return self._value
+        return str(self.value)
 
 
 class ElectMessage(Message):
-    def __init__(self, value: int, stage: int, counter: int):
-        self._stage = stage
-        self._counter = counter
-        super().__init__(value)
+    __slots__ = ("stage", "counter")
 
-    @property
-    def stage(self):
-        return self._stage
+    # Whether released messages are kept for reuse. Off by default, as allocating a slotted message is already cheap
+    # in CPython. Turn it on to keep the allocator out of the way when millions of chains start and end.
+    pooling = False
+    # Messages whose chain has ended, kept so that they can be reused rather than allocated again
+    _free_list = []
+    # The most messages we keep for reuse
+    MAX_FREE = 1024
 
-    @property
-    def counter(self):
-        return self._counter
+    def __init__(self, value: int, stage: int, counter: int):
+        self.value = value
+        self.stage = stage
+        self.counter = counter
+
+    @classmethod
+    def create(cls, value: int, stage: int, counter: int):
+        """
+        Create a message, reusing one that has been released if there is one.
+        :return: The message.
+        """
+        if not cls._free_list:
+            return cls(value, stage, counter)
 
-    @stage.setter
-    def stage(self, stage):
-        self._stage = stage
+        try:
+            message = cls._free_list.pop()
+        except IndexError:
+            # Another thread took the last one
+            return cls(value, stage, counter)
+        message.value = value
+        message.stage = stage
+        message.counter = counter
+        return message
 
-    @counter.setter
-    def counter(self, counter):
-        self._counter = counter
+    @classmethod
+    def release(cls, message):
+        """
+        Hand back a message that will no longer be sent, so it can be reused by create.
+        The caller must not hold on to the message afterwards.
+        :param message: The message to release.
+        :return: None
+        """
+        if cls.pooling and len(cls._free_list) < cls.MAX_FREE:
+            cls._free_list.append(message)
 
 
 class NotifyMessage(Message):
+    __slots__ = ()
+
     def __init__(self, value: None):
         super().__init__(value)
 
 
 class WakeUpMessage(Message):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__(value)
+
+
+class RelayedMessage(Message):
+    """
+    Passes on the value a candidate received from the candidate before it. Peterson's algorithm sends one after
+    each ElectMessage, so that every candidate learns the values of the two candidates before it.
+    """
+    __slots__ = ("stage",)
+
+    def __init__(self, value: int, stage: int):
+        self.value = value
+        self.stage = stage
+
+
+class DirectedMessage(Message):
+    """
+    A message that knows the direction it travels in, for the algorithms that send messages both ways.
+    Nodes that only pass the message on send it further in the same direction.
+    """
+    __slots__ = ("stage", "direction")
+
+    def __init__(self, value: int, stage: int, direction):
+        self.value = value
+        self.stage = stage
+        self.direction = direction
+
+
+class ProbeMessage(DirectedMessage):
+    """
+    Sent by a candidate of Hirschberg-Sinclair to the nodes up to 2^stage hops away. Counts the hops it has made.
+    """
+    __slots__ = ("hops",)
+
+    def __init__(self, value: int, stage: int, direction, hops: int):
+        super().__init__(value, stage, direction)
+        self.hops = hops
+
+
+class ReplyMessage(DirectedMessage):
+    """
+    Sent back to a candidate of Hirschberg-Sinclair by the last node its probe reached.
+    """
+    __slots__ = ()
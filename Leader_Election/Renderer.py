@@ -0,0 +1,102 @@
+import math
+
+import matplotlib.pyplot as plt
+import matplotlib.animation as animation
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba_array
+
+from EventLog import EventLog, STATES
+from State import State
+
+# The colour of a node in each state
+COLOURS = {State.CANDIDATE: "green", State.ORIGINATOR: "green", State.LEADER: "red",
+           State.ASLEEP: "grey", State.DEFEATED: "grey"}
+
+
+def circle_layout(size):
+    """
+    Place the nodes evenly on the unit circle, in the same order as they are in the ring.
+    :param size: The number of nodes in the ring.
+    :return: A list of (x, y) positions.
+    """
+    return [(math.cos(2 * math.pi * i / size), math.sin(2 * math.pi * i / size)) for i in range(size)]
+
+
+class Renderer:
+    """
+    Turns the event log of an election into an animation. This is the only module that needs matplotlib,
+    and Ring only imports it when we ask for an animation.
+    The ring is laid out and its edges are drawn once. Each frame then only recolours and relabels the node
+    that changed, and is written straight to the file, so no frame is ever held in memory.
+    """
+    def __init__(self, event_log: EventLog):
+        self._event_log = event_log
+
+    def changes(self):
+        """
+        Replay the event log one step at a time.
+        :return: A generator of (index of the node that acted, its new value, its new state, caption) for each frame
+        after the initial one.
+        """
+        values = list(self._event_log.initial_values)
+        for step in self._event_log.steps():
+            index, _, state, _, value, _, _, _ = step
+            values[index] = value
+            yield index, value, STATES[state], EventLog.describe(step, values)
+
+    @staticmethod
+    def writer(path, fps):
+        """
+        Choose a writer that streams each frame to the file. ffmpeg streams every frame to its own process. Without
+        it, we fall back on Pillow for GIFs, which keeps the compressed frames until the file is written.
+        :param path: The file the animation is saved to. Its extension decides the format.
+        :param fps: The number of frames per second.
+        :return: A matplotlib writer.
+        """
+        if animation.writers.is_available("ffmpeg"):
+            return animation.FFMpegWriter(fps=fps)
+        if str(path).endswith(".gif"):
+            return animation.PillowWriter(fps=fps)
+        raise Exception(f"Saving {path} requires ffmpeg.")
+
+    def save(self, path, animation_speed, dpi=100):
+        """
+        Render every frame of the event log and save the animation.
+        :param path: The file the animation is saved to. Either a .gif or a .mp4.
+        :param animation_speed: The number of milliseconds per frame.
+        :param dpi: The resolution of the frames.
+        :return: None
+        """
+        values = self._event_log.initial_values
+        states = self._event_log.initial_states
+        positions = circle_layout(len(values))
+
+        fig, ax = plt.subplots()
+        # Fix limits (unless you want a zoom-out effect)
+        ax.set_xlim(-1.5, 1.5)
+        ax.set_ylim(-1.5, 1.5)
+        ax.set_aspect("equal")
+        ax.set_axis_off()
+
+        # The edges never change, so they are only drawn once
+        ax.add_collection(LineCollection([(positions[i], positions[(i + 1) % len(positions)])
+                                          for i in range(len(positions))], colors="black", zorder=1))
+        colours = to_rgba_array([COLOURS[state] for state in states])
+        vertices = ax.scatter([x for x, _ in positions], [y for _, y in positions], s=min(400, 40000 / len(positions)),
+                              c=colours, edgecolors="black", zorder=2)
+        labels = [ax.text(x, y, str(value), ha="center", va="center", zorder=3)
+                  for (x, y), value in zip(positions, values)]
+        title = ax.set_title(self._event_log.caption(0))
+
+        writer = self.writer(path, fps=1000 / animation_speed)
+        with writer.saving(fig, path, dpi):
+            writer.grab_frame()
+            for index, value, state, caption in self.changes():
+                # Only the node that acted can have changed
+                colours[index] = to_rgba_array(COLOURS[state])[0]
+                vertices.set_facecolor(colours)
+                labels[index].set_text(str(value))
+                title.set_text(caption)
+                writer.grab_frame()
+
+        plt.close(fig)
@@ -1,20 +1,13 @@
-import copy
-from enum import Enum
-
-from Message import Message
+from Channel import Channel
+from Direction import Direction
+from EventLog import EventLog
 from State import State
 from Algorithms import Algorithm
-from threading import Thread
-from random import sample
-import igraph as ig
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from functools import partial
-
-
-class Direction(Enum):
-    LEFT = "Left"
-    RIGHT = "Right"
+from Message import Message, ElectMessage, NotifyMessage
+from Engines import Engine, ThreadedEngine
+from Instrumentation import Hooks, Broadcast
+from Generators import choose_originators
+from itertools import repeat
 
 
 class Node:
@@ -24,7 +17,16 @@ class Node:
         self._right = right
         self._state = State.ASLEEP
         self._stage = 0
-        self._message_buffer = []
+        # The channel to the neighbour in each direction, and the channels bringing messages to this node.
+        # These are set when the ring is created.
+        self._channels = {}
+        self._inbox = []
+        # The position of the node in the ring. Set when the ring is created.
+        self._index = None
+        # Receives the events of the node, when the ring is instrumented
+        self._hooks = None
+        # What the algorithm remembers between messages, if it needs to. Set when the ring is created.
+        self._memory = None
 
     @property
     def value(self):
@@ -47,8 +49,40 @@ class Node:
         return self._stage
 
     @property
-    def message_buffer(self):
-        return self._message_buffer
+    def channels(self):
+        return self._channels
+
+    @property
+    def inbox(self):
+        return self._inbox
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def hooks(self):
+        return self._hooks
+
+    @property
+    def memory(self):
+        return self._memory
+
+    @index.setter
+    def index(self, index):
+        self._index = index
+
+    @hooks.setter
+    def hooks(self, hooks):
+        self._hooks = hooks
+
+    @memory.setter
+    def memory(self, memory):
+        self._memory = memory
+
+    @value.setter
+    def value(self, value):
+        self._value = value
 
     @left.setter
     def left(self, node):
@@ -83,56 +117,123 @@ class Node:
         :param direction: Left or Right.
         :return: None
         """
-        node = self._right if direction == Direction.RIGHT else self._left
-        node.message_buffer.append(message)
+        channel = self._channels[direction]
+        # Announce the message before pushing it, as once it is in the channel the receiver may handle it at any time
+        if self._hooks is not None:
+            self._hooks.on_send(self, channel.target, message)
+        channel.push(message)
 
         return None
 
-    def act(self, direction: Direction, algorithm: Algorithm):
+    def send_all(self, outgoing, direction: Direction):
+        """
+        Send whatever handle returned.
+        :param outgoing: A message, a list of (Message, Direction) pairs, or None.
+        :param direction: The direction of the ring, in which a single message is sent.
+        :return: A list of the (Message, Channel) pairs that were sent, in order.
+        """
+        if outgoing is None:
+            return []
+        if type(outgoing) is not list:
+            outgoing = ((outgoing, direction),)
+
+        sent = []
+        for message, towards in outgoing:
+            self.send(message, towards)
+            sent.append((message, self._channels[towards]))
+        return sent
+
+    def receive(self):
         """
-        This method is used in the general case. When we are executing a turn for a specific node.
-        :return: (continue) --> (bool) This is a boolean value indicating whether we should continue on this thread.
+        This method takes the oldest message from the first of our channels holding one.
+        :return: (Message) The message, or None if no message is waiting.
+        """
+        for channel in self._inbox:
+            if channel.queue:
+                return channel.queue.popleft()
+        return None
+
+    def handle(self, algorithm: Algorithm, incoming_message: Message):
         """
-        while len(self._message_buffer) > 0 or self._state == State.ORIGINATOR:
-            # Iterate through the message buffer until it's empty.
+        This method runs the algorithm on a single incoming message and updates the node with the result.
+        :param algorithm: The algorithm we are using.
+        :param incoming_message: The message delivered to the node. None when an originator wakes up.
+        :return: (Message) The message the node wants to send, or None. Algorithms that send in both directions may
+        instead return a list of (Message, Direction) pairs.
+        """
+        old_state, old_stage = self._state, self._stage
+        # Only algorithms with a memory are handed one, so algorithms written before memory existed still work
+        if self._memory is None:
+            state, value, message = \
+                algorithm.act(node_state=old_state, node_value=self._value, node_stage=old_stage,
+                              incoming_message=incoming_message)
+        else:
             state, value, message = \
-                algorithm.act(node_state=self._state, node_value=self._value, node_stage=self._stage,
-                              incoming_message=None if self._state == State.ORIGINATOR
-                              else self._message_buffer.pop(0))
+                algorithm.act(node_state=old_state, node_value=self._value, node_stage=old_stage,
+                              incoming_message=incoming_message, node_memory=self._memory)
+
+        # Update the parameters
+        self._state = state
+        self._value = value
+        if message is not None:
+            self._stage = message.stage if type(message) is not list else message[0][0].stage
 
-            # Update the parameters
-            self._state = state
-            self._value = value
+        if self._hooks is not None:
+            self._hooks.handled(self, incoming_message, old_state, old_stage)
 
-            # Otherwise we continue with the general case and send a message. If the message isn't none.
-            if message is not None:
-                self._stage = message.stage
-                self.send(message, direction)
-                return True
-        # We return False if we do not send a message.
-        return False
+        if message is None and type(incoming_message) is ElectMessage:
+            # The chain of this message has ended, so it can be reused
+            ElectMessage.release(incoming_message)
+
+        return message
 
 
 class Ring:
-    def __init__(self, nodes: [Node], direction: Direction, algorithm, number_of_originators):
+    def __init__(self, nodes: [Node], direction: Direction, algorithm: Algorithm, number_of_originators,
+                 headless=False, channel_capacity=None, channel_delay=1.0, originator_strategy="random", seed=None):
+        """
+        :param headless: When True, nothing is recorded for the animation. We only keep track of the leader and
+        the number of messages, which makes the election faster. The ring cannot be visualized.
+        :param channel_capacity: The most messages each channel can hold at once. Unbounded if None.
+        :param channel_delay: The time a message spends on each channel, used by the discrete event engine.
+        :param originator_strategy: How the originators are chosen. The name of a strategy in
+        Generators.ORIGINATOR_STRATEGIES, such as "random", "spread" or "largest", or a function of our own.
+        :param seed: The seed for choosing the originators. If None, they are drawn from the global random module.
+        """
         self._nodes = nodes
         self._direction = direction
         self._algorithm = algorithm
+        self._headless = headless
+        self._channel_capacity = channel_capacity
+        self._channel_delay = channel_delay
         # This value will maintain the total number of messages we send
         self._messages = 0
+        # The leader node, as soon as it has been elected
+        self._leader = None
+        # Receives the events of the election. See Ring.instrument.
+        self._hooks = None
+        # The nodes that lost their neighbour when the leader was removed, and the nodes that joined since the last
+        # election. See Ring.repair.
+        self._orphans = []
+        self._newcomers = []
+        # Nodes from this position on may have the wrong index, since nodes were removed or inserted before them.
+        # See Ring.renumber.
+        self._stale_from = None
+        # The nodes a repair changed, with the state each had before, when the repair took no snapshot of the ring.
+        # See Ring.repair.
+        self._repaired = []
         # Create the ring
-        self.create_ring(number_of_originators=number_of_originators)
+        self.create_ring(number_of_originators=number_of_originators, originator_strategy=originator_strategy,
+                         seed=seed)
+
+        # Keep the starting values, so the ring can be reset
+        self._initial_values = [node.value for node in self._nodes]
+        self._initial_states = [node.state for node in self._nodes]
+        self._initial_stages = None
 
         # The following are used for animation
-        # This will hold the sequence of labels for the animation. Seed it with the starting values.
-        self._stage_list = [[copy.deepcopy(node) for node in self._nodes]]
-        # List of messages that we will display in the animation
-        self._message_list = ["Initial state"]
-        # Index used for creating the animation at the end
-        self._stage_index = 0
-        # The dictionary containing the colours
-        self._colour_dict = {State.CANDIDATE: "green", State.ORIGINATOR: "green", State.LEADER: "red",
-                             State.ASLEEP: "grey", State.DEFEATED: "grey"}
+        # This will hold the changes made by every message. Seed it with the starting values.
+        self._event_log = None if headless else EventLog(self._initial_values, self._initial_states)
 
     @property
     def nodes(self):
@@ -143,24 +244,70 @@ class Ring:
         return self._direction
 
     @property
-    def stage_list(self):
-        return self._stage_list
+    def algorithm(self):
+        return self._algorithm
+
+    @property
+    def initial_values(self):
+        """
+        :return: The values of the nodes before the election, from left to right.
+        """
+        if self._initial_values is None:
+            self.snapshot()
+        return self._initial_values
+
+    @property
+    def initial_states(self):
+        """
+        :return: The states of the nodes before the election, from left to right.
+        """
+        if self._initial_states is None:
+            self.snapshot()
+        return self._initial_states
+
+    @property
+    def messages(self):
+        return self._messages
+
+    @property
+    def headless(self):
+        return self._headless
+
+    @property
+    def event_log(self):
+        return self._event_log
+
+    @property
+    def hooks(self):
+        return self._hooks
+
+    @property
+    def channels(self):
+        """
+        :return: Every channel of the ring, in the order of the nodes sending over them.
+        """
+        return [channel for node in self._nodes for channel in node.channels.values()]
 
     @direction.setter
     def direction(self, direction):
         self._direction = direction
+        # Messages now travel the other way, so the channels must too
+        self.create_channels()
 
-    def create_ring(self, number_of_originators):
+    def create_ring(self, number_of_originators, originator_strategy="random", seed=None):
         """
         This function will string up the nodes in order to form a ring. From left to right.
         :return: Returns the same list of nodes, that can then be used for running algorithms.
         """
-        if number_of_originators > len(self._nodes):
-            raise Exception("Number of originators is greater than the length of the list.")
+        # The originators are chosen at random by default
+        values = [node.value for node in self._nodes]
+        for index in choose_originators(values, number_of_originators, originator_strategy, seed):
+            self._nodes[index].state = State.ORIGINATOR
 
-        # The originators are chosen at random
-        for node in sample(self._nodes, number_of_originators):
-            node.state = State.ORIGINATOR
+        # Number each node by its position in the ring
+        for i, node in enumerate(self._nodes):
+            node.index = i
+            node.memory = self._algorithm.initial_memory()
 
         # Connect each node to the one to their right and vice versa
         for i in range(0, len(self._nodes) - 1):
@@ -171,90 +318,354 @@ class Ring:
         self._nodes[-1].right = self._nodes[0]
         self._nodes[0].left = self._nodes[-1]
 
-    def leader_election(self):
+        self.create_channels()
+
+    def create_channels(self):
+        """
+        This function will create a channel from each node to its neighbour, in the direction messages are sent.
+        Algorithms that send messages both ways get a channel in each direction.
+        :return: None
         """
-        Each thread will begin at an originator and follow its message around the ring until
-        No more messages are being sent from this node
+        for node in self._nodes:
+            node.channels.clear()
+            node.inbox.clear()
+
+        for direction in self.channel_directions():
+            for node in self._nodes:
+                self.connect(node, direction)
+
+    def channel_directions(self):
+        """
+        :return: The directions in which every node has a channel.
+        """
+        return [self._direction] if self._algorithm.unidirectional else [Direction.LEFT, Direction.RIGHT]
+
+    def connect(self, node: Node, direction: Direction):
+        """
+        Give the node a channel to its current neighbour in the given direction, replacing the channel it had.
+        :return: None
+        """
+        old_channel = node.channels.get(direction)
+        if old_channel is not None:
+            old_channel.target.inbox.remove(old_channel)
+
+        neighbour = node.right if direction == Direction.RIGHT else node.left
+        channel = Channel(node, neighbour, direction, self._channel_capacity, self._channel_delay)
+        node.channels[direction] = channel
+        neighbour.inbox.append(channel)
+
+    def instrument(self, *sinks: Hooks):
+        """
+        Attach sinks from Instrumentation.py to every node, to receive the events of the election. Call with no sinks
+        to detach them again. Without sinks the nodes skip the events entirely, so they cost nothing.
+        :param sinks: The hooks receiving the events.
+        :return: The hooks attached to the nodes, or None.
+        """
+        self._hooks = None if not sinks else sinks[0] if len(sinks) == 1 else Broadcast(sinks)
+        for node in self._nodes:
+            node.hooks = self._hooks
+        return self._hooks
+
+    def channel_statistics(self):
+        """
+        :return: A list with the statistics of each channel, such as the number of messages it carried.
+        """
+        self.renumber()
+        return [channel.statistics() for channel in self.channels]
+
+    def reset(self):
+        """
+        This function will put every node back into the state it was in before the election. Keeping the same
+        values and originators. This allows us to compare different engines on the same ring.
+        :return: None
+        """
+        self._messages = 0
+        if self._initial_values is None:
+            # The repair only told new nodes about the leader, so only they have to be put back
+            for node, state in self._repaired:
+                node.state = state
+            self._newcomers = [node for node, _ in self._repaired]
+            self._event_log = None if self._headless else EventLog(self.initial_values, self.initial_states)
+            return
+
+        # Every node starts at stage 0, unless the ring is being reset to the start of a repair
+        stages = self._initial_stages or repeat(0)
+        self._leader = None
+        asleep = []
+        for node, value, state, stage in zip(self._nodes, self._initial_values, self._initial_states, stages):
+            node.value = value
+            node.state = state
+            node.stage = stage
+            node.memory = self._algorithm.initial_memory()
+            for channel in node.channels.values():
+                channel.clear()
+            if state == State.LEADER:
+                self._leader = node
+            elif state == State.ASLEEP:
+                asleep.append(node)
+
+        # Nodes that joined a ring with a leader have to be told about it again by repair
+        self._newcomers = asleep if self._leader is not None else []
+        self._orphans = []
+        self._event_log = None if self._headless else EventLog(self._initial_values, self._initial_states)
+
+    def renumber(self):
+        """
+        Bring the index of every node up to date with its position, after nodes were removed or inserted. Only the
+        nodes after the first change are renumbered, and nothing is done if the indices are already right.
+        :return: None
+        """
+        if self._stale_from is None:
+            return
+        nodes = self._nodes
+        for index in range(self._stale_from, len(nodes)):
+            nodes[index].index = index
+        self._stale_from = None
+
+    def snapshot(self):
+        """
+        Keep the values, states and stages of the nodes as the point reset goes back to, undoing what the last
+        repair changed if it took no snapshot itself.
+        :return: None
+        """
+        self.renumber()
+        self._initial_values = [node.value for node in self._nodes]
+        self._initial_states = [node.state for node in self._nodes]
+        self._initial_stages = [node.stage for node in self._nodes]
+        for node, state in self._repaired:
+            self._initial_states[node.index] = state
+        self._repaired = []
+
+    def leader_election(self, engine: Engine = None):
+        """
+        Run the election on the ring using the given engine. By default, each originator gets its own thread.
+        :param engine: The engine that decides in which order the messages are delivered.
         :return: The leader and the number of messages for this algorithm
         """
+        if self._leader is not None:
+            # Only a ring reset to the start of a repair that kept its leader gets here, and only repair can replay it
+            raise Exception("The ring already has a leader, call repair to tell the new nodes about it.")
+        if engine is None:
+            engine = ThreadedEngine()
 
-        # Create a pool of threads for each originator
-        thread_pool = [
-            Thread(target=Ring.thread_act, args=(self, node, self._direction, self._algorithm, ))
-            for node in self._nodes if node.state == State.ORIGINATOR
-        ]
+        # The engines look nodes up by their index
+        self.renumber()
+        return engine.run(self)
 
-        # Starting all the threads
-        for thread in thread_pool:
-            thread.start()
+    def remove_node(self, node: Node):
+        """
+        Take a node out of the ring, as if it had crashed, and link its neighbours to each other. Only the channels
+        into the gap are replaced, the rest of the ring is left as it is. Call repair to restore a leader.
+        :param node: The node to remove. The ring must be quiet, with no election running.
+        :return: None
+        """
+        if len(self._nodes) == 1:
+            raise Exception("The last node of a ring cannot be removed.")
+
+        left, right = node.left, node.right
+        for channel in node.channels.values():
+            channel.target.inbox.remove(channel)
+
+        # The index of the node is only right if no node before it was removed or inserted since the last renumbering
+        position = node.index
+        if self._stale_from is not None and position >= self._stale_from:
+            position = self._nodes.index(node, self._stale_from)
+        del self._nodes[position]
+        self._stale_from = position if self._stale_from is None else min(self._stale_from, position)
+        left.right, right.left = right, left
+        for direction in self.channel_directions():
+            self.connect(left if direction == Direction.RIGHT else right, direction)
+
+        if node.state == State.LEADER:
+            self._leader = None
+            # The node that received from the leader is the first to notice it is gone
+            self._orphans.append(right if self._direction == Direction.RIGHT else left)
+        if node in self._orphans:
+            self._orphans.remove(node)
+        if node in self._newcomers:
+            self._newcomers.remove(node)
+
+        node.channels.clear()
+        node.inbox.clear()
+        node.left = node.right = node.index = None
+
+    def insert_node(self, value: int, position: int):
+        """
+        Add a new, asleep node to the ring, as if it had joined it, between the nodes at position - 1 and position.
+        Only the channels across the new node are replaced. Call repair to tell it who the leader is. The nodes after
+        it keep their old index until renumber is called, which elections do themselves.
+        :param value: The value of the new node.
+        :param position: The index the new node will have, from 0 to the number of nodes.
+        :return: The new node.
+        """
+        if not 0 <= position <= len(self._nodes):
+            raise ValueError(f"Position {position} is outside of a ring of {len(self._nodes)} nodes.")
+
+        node = Node(value, None, None)
+        node.memory = self._algorithm.initial_memory()
+        node.hooks = self._hooks
+
+        right = self._nodes[position % len(self._nodes)]
+        left = right.left
+        self._nodes.insert(position, node)
+        # The node that was at this position still has its index, so the new node cannot be told apart from it
+        node.index = position
+        self._stale_from = position if self._stale_from is None else min(self._stale_from, position)
+        node.left, node.right = left, right
+        left.right = right.left = node
+        for direction in self.channel_directions():
+            self.connect(node, direction)
+            self.connect(left if direction == Direction.RIGHT else right, direction)
+
+        self._newcomers.append(node)
+        return node
+
+    def repair(self, engine: Engine = None):
+        """
+        Restore a single leader after nodes have been removed or inserted, reusing what the last election decided.
+        If the leader survived, each new node is told who the leader is by its neighbour, one message each. If the
+        leader was removed, the defeated nodes stay defeated and only pass messages on. The node that noticed the
+        leader was gone starts a new election as the only originator, so the algorithm needs about one lap of the
+        ring, rather than a whole election from asleep nodes.
+        The repair becomes the new starting point of the ring: its messages are counted from zero, it is what the
+        event log records, and reset goes back to just before it, so it can be run again with another engine.
+        :param engine: The engine that runs the new election, if one is needed. By default, as in leader_election.
+        :return: The leader and the number of messages the repair took.
+        """
+        self._messages = 0
+        self._repaired = []
+        if self._leader is None:
+            # Candidates left over from the last election lost it, they only never heard so. Originators are only
+            # left by a reset to the start of an earlier repair, which is then run again as it was.
+            waiting = []
+            for node in self._nodes:
+                if node.state == State.CANDIDATE:
+                    node.state = State.DEFEATED
+                elif node.state == State.ORIGINATOR:
+                    waiting.append(node)
+            # Nodes that were asleep wake up when the message reaches them, so they need no telling
+            self._newcomers.clear()
+            originators = list(self._orphans) or waiting or [self._nodes[0]]
+            for node in originators:
+                node.state = State.ORIGINATOR
+                node.stage = 0
+                node.memory = self._algorithm.initial_memory()
+            self._orphans.clear()
+
+            # The new election goes all the way around the ring, so a snapshot of it costs no more than the election
+            self.snapshot()
+            self._event_log = None if self._headless else EventLog(self._initial_values, self._initial_states)
+            return self.leader_election(engine)
+
+        # Only the new nodes change, so the snapshot reset needs is only taken once something asks for it
+        self._initial_values = self._initial_states = self._initial_stages = None
+        self._repaired = [(node, node.state) for node in self._newcomers]
+        if not self._headless:
+            # The event log starts from a snapshot of the whole ring, which a headless ring never needs
+            self._event_log = EventLog(self.initial_values, self.initial_states)
+        if self._hooks is not None:
+            self.renumber()
+
+        for node in self._newcomers:
+            # The neighbour that sends to the new node tells it about the leader
+            sender = node.left if self._direction == Direction.RIGHT else node.right
+            notification = NotifyMessage(self._leader.value)
+            sender.send(notification, self._direction)
+            self.record_step(sender, sender.state, sender.value, node, notification)
+
+            node.receive()
+            node.state = State.DEFEATED
+            if node.hooks is not None:
+                node.hooks.handled(node, notification, State.ASLEEP, node.stage)
+            self.record_step(node, State.ASLEEP, node.value)
+        self._newcomers.clear()
+
+        return self._leader.value, self._messages
+
+    def leader(self):
+        """
+        :return: The node that has been elected leader.
+        """
+        if self._leader is None:
+            raise Exception("The election finished without electing a leader.")
+        return self._leader
+
+    def deliver(self, node: Node, incoming_message: Message):
+        """
+        Hand a message to a node, send whatever it answers and record the step. Used by the engines that run on a
+        single thread. When a node sends several messages, only the first records the change to the node, the others
+        are steps of their own.
+        :param node: The node receiving the message.
+        :param incoming_message: The message. None when an originator wakes up.
+        :return: A list of the (Message, Channel) pairs that were sent, in order.
+        """
+        state, value = node.state, node.value
+        sent = node.send_all(node.handle(self._algorithm, incoming_message), self._direction)
+        if not sent:
+            self.record_step(node, state, value)
+        for message, channel in sent:
+            self.record_step(node, state, value, channel.target, message)
+            state, value = node.state, node.value
+        return sent
+
+    def record_step(self, node: Node, state: State, value: int, receiver: Node = None, message: Message = None):
+        """
+        Count the message sent by a node, if any, and record what the step changed in the event log.
+        :param node: The node that acted.
+        :param state: The state of the node before it acted.
+        :param value: The value of the node before it acted.
+        :param receiver: The node the message was sent to. None if no message was sent.
+        :param message: The message that was sent.
+        :return: None
+        """
+        # Only the node that acted can have been elected
+        if node.state == State.LEADER:
+            self._leader = node
 
-        # Joining all the threads
-        for thread in thread_pool:
-            thread.join()
+        if message is None:
+            if self._event_log is not None:
+                self._event_log.record(node.index, state, node.state, value, node.value, node.stage)
+            return
 
-        leader_node = [node for node in self._nodes if node.state == State.LEADER][0]
-        return leader_node.value, self._messages
+        self._messages += 1
+        if self._event_log is not None:
+            self._event_log.record(node.index, state, node.state, value, node.value, node.stage,
+                               receiver.index, message.value)
 
-    def thread_act(self, node: Node, direction: Direction, algorithm: Algorithm):
+    def record_result(self, leader: Node, messages: int):
         """
-        Each thread will begin at an originator and follow its message around the ring until
-        No more messages are being sent from this node
-        :param node: The node we begin at. An originator.
-        :param direction: The direction to send messages.
-        :param algorithm: The algorithm we are using.
+        Record the outcome of an election that was run outside of this process, so nothing was recorded step by step.
+        :param leader: The node that was elected.
+        :param messages: The number of messages that were sent.
+        :return: None
+        """
+        self._leader = leader
+        self._messages += messages
+
+    def save_trace(self, path):
+        """
+        Save the election as a binary trace, which can be read back and replayed with Trace.TraceReader.
+        :param path: The file to write to, or a binary file object.
+        :return: None
+        """
+        if self._headless:
+            raise Exception("A headless ring records nothing to save.")
+
+        from Trace import write_trace
+        write_trace(path, self._event_log, self._algorithm, self._direction)
+
+    def visualize(self, animation_speed, path=None):
+        """
+        Save an animation of the election.
+        :param animation_speed: The number of milliseconds per frame.
+        :param path: The file to save to, either a .gif or a .mp4. Named after the algorithm by default.
         :return: None
         """
-        # We will continue until we are told to stop. As we are no longer forwarding messages.
-        while node.act(direction, algorithm):
-            node = node.right if direction == Direction.RIGHT else node.left
-            self._messages += 1
-
-            # Make a deepcopy of each node, so we can reference it later for animation
-            self._stage_list.append([copy.deepcopy(node) for node in self._nodes])
-
-            # Append the message here
-            if len(node.message_buffer) == 0:
-                self._message_list.append(f"The node {node.value} has received no message")
-            else:
-                message: Message = node.message_buffer[-1]
-                self._message_list.append(f"The node {node.value} has received the message {message.value}")
-        # Append the final stage and message
-        self._stage_list.append([copy.deepcopy(node) for node in self._nodes])
-        self._message_list.append(f"The node {node.value} has received no message")
-
-        return
-
-    def update_graph(self, ax, g, layout, frame):
-        # Remove plot elements from the previous frame
-        ax.clear()
-
-        # Fix limits (unless you want a zoom-out effect)
-        ax.set_xlim(-1.5, 1.5)
-        ax.set_ylim(-1.5, 1.5)
-
-        # Set the colours for this stage and increase the stage index
-        vertex_labels = [node.value for node in self._stage_list[self._stage_index]]
-
-        # Only move the to the next stage if we have moved to the next frame
-        if self._stage_index < frame:
-            self._stage_index += 1
-
-        vertex_colours = [self._colour_dict[node.state] for node in self._stage_list[self._stage_index]]
-
-        # Add a caption for what's happening right now
-        # ax.text(2, 6, r'an equation: $E=mc^2$', fontsize=15)
-        # ax.text(3, 8, f"Send message {self._stage_index}", style='italic',
-        #         bbox={'facecolor': 'red', 'alpha': 0.5, 'pad': 10})
-        ax.set_title(self._message_list[self._stage_index])
-        ig.plot(g, target=ax, vertex_label=vertex_labels, vertex_color=vertex_colours)
-
-        return ax.get_children()
-
-    def visualize(self, animation_speed):
-        g = ig.Graph.Ring(len(self._nodes), directed=False)
-        layout = g.layout_circle()
-        fig, ax = plt.subplots()
-        ani = animation.FuncAnimation(fig, partial(self.update_graph, ax, g, layout), len(self._stage_list),
-                                      interval=animation_speed, blit=False)
-        writergif = animation.PillowWriter(fps=1)
-        ani.save(f'animation_{type(self._algorithm).__name__}.gif', writer=writergif)
+        if self._headless:
+            raise Exception("A headless ring records nothing to visualize.")
+
+        # Plotting is expensive to import, so we only import the renderer when we need it
+        from Renderer import Renderer
+        if path is None:
+            path = f'animation_{type(self._algorithm).__name__}.gif'
+        Renderer(self._event_log).save(path, animation_speed)
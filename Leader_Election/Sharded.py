@@ -0,0 +1,441 @@
+import multiprocessing
+import os
+import threading
+import time
+from array import array
+from collections import deque
+from multiprocessing.connection import Client, Listener
+
+from Algorithms import Algorithm
+from Direction import Direction
+from Engines import Engine
+from EventLog import STATES, STATE_CODES
+from Message import ElectMessage
+from State import State
+
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:
+    SharedMemory = None
+
+# Layout of a message crossing from one arc to the next: value, stage, counter
+RECORD_WIDTH = 3
+# Messages waiting to cross are sent in batches of at most this many
+BATCH_SIZE = 4096
+
+# Commands sent by the coordinator to the workers
+PROBE = "probe"
+STOP = "stop"
+
+
+def partition(size, arcs):
+    """
+    Split the indices of a ring into contiguous arcs of (almost) the same length.
+    :param size: The number of nodes in the ring.
+    :param arcs: The number of arcs.
+    :return: A list of (start, end) index pairs, one per arc.
+    """
+    bounds = [size * i // arcs for i in range(arcs + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def encode(message):
+    if type(message) is not ElectMessage:
+        raise Exception(f"Only ElectMessages can be passed between processes, not {type(message).__name__}.")
+    return message.value, message.stage, message.counter
+
+
+class SharedRingBuffer:
+    """
+    A single producer, single consumer queue of message records held in shared memory.
+    The first two slots hold the number of records written and read so far. Only the producer moves the first and
+    only the consumer moves the second, and each is published only after the records it covers, so no lock is needed.
+    """
+    def __init__(self, memory):
+        self._memory = memory
+        self._slots = memory.buf.cast('q')
+        self._capacity = (len(self._slots) - 2) // RECORD_WIDTH
+
+    @classmethod
+    def create(cls, capacity):
+        """
+        :param capacity: The number of records the buffer can hold.
+        :return: A new buffer, backed by a new block of shared memory.
+        """
+        memory = SharedMemory(create=True, size=(capacity * RECORD_WIDTH + 2) * 8)
+        memory.buf[:16] = bytes(16)
+        return cls(memory)
+
+    @property
+    def memory(self):
+        return self._memory
+
+    def write(self, records):
+        """
+        Write as many of the records as there is room for. Never blocks, so that a full buffer cannot deadlock the ring.
+        :param records: An array of records, RECORD_WIDTH integers each.
+        :return: The number of records written.
+        """
+        slots, capacity = self._slots, self._capacity
+        written, read = slots[0], slots[1]
+        count = min(len(records) // RECORD_WIDTH, capacity - (written - read))
+        for i in range(count):
+            start = 2 + ((written + i) % capacity) * RECORD_WIDTH
+            slots[start:start + RECORD_WIDTH] = records[i * RECORD_WIDTH:(i + 1) * RECORD_WIDTH]
+        slots[0] = written + count
+        return count
+
+    def read(self):
+        """
+        :return: An array of all the records waiting in the buffer. Empty if there are none.
+        """
+        slots, capacity = self._slots, self._capacity
+        written, read = slots[0], slots[1]
+        records = array('q')
+        for position in range(read, written):
+            start = 2 + (position % capacity) * RECORD_WIDTH
+            records.extend(slots[start:start + RECORD_WIDTH])
+        slots[1] = written
+        return records
+
+    def close(self):
+        """
+        Release our view of the buffer. The shared memory itself is closed and unlinked by the coordinator, which owns
+        it.
+        """
+        self._slots.release()
+
+
+class SharedMemoryLink:
+    """
+    The link from one arc to the next, over a ring buffer in shared memory.
+    """
+    def __init__(self, outgoing: SharedRingBuffer, incoming: SharedRingBuffer):
+        self._outgoing = outgoing
+        self._incoming = incoming
+        # Records that did not fit into the buffer yet
+        self._backlog = array('q')
+
+    def send(self, records):
+        self._backlog.extend(records)
+        written = self._outgoing.write(self._backlog)
+        del self._backlog[:written * RECORD_WIDTH]
+
+    def flushed(self):
+        """
+        :return: Whether every record sent has been handed to the next arc.
+        """
+        if self._backlog:
+            self.send(array('q'))
+        return not self._backlog
+
+    def receive(self):
+        return self._incoming.read()
+
+    def close(self):
+        self._outgoing.close()
+        self._incoming.close()
+
+
+class SocketLink:
+    """
+    The link from one arc to the next, over a socket on localhost. Used where shared memory is not available.
+    A thread does the sending, so that a full socket cannot deadlock the ring.
+    """
+    def __init__(self, outgoing, incoming):
+        self._outgoing = outgoing
+        self._incoming = incoming
+        self._pending = deque()
+        self._queued = 0
+        self._sent = 0
+        self._ready = threading.Condition()
+        self._sender = threading.Thread(target=self._send_batches, daemon=True)
+        self._sender.start()
+
+    @classmethod
+    def connect(cls, control, authkey):
+        """
+        Listen on localhost, and tell the coordinator where. Then connect to the next arc, at the address the
+        coordinator sends back, and accept the connection from the previous arc. Every arc connects at the same time,
+        so we accept on a thread.
+        :param control: The connection to the coordinator.
+        :param authkey: The key shared by the arcs of the ring.
+        :return: The link.
+        """
+        listener = Listener(('localhost', 0), authkey=authkey)
+        control.send(listener.address)
+        accepted = []
+        acceptor = threading.Thread(target=lambda: accepted.append(listener.accept()))
+        acceptor.start()
+        outgoing = Client(control.recv(), authkey=authkey)
+        acceptor.join()
+        listener.close()
+        return cls(outgoing, accepted[0])
+
+    def _send_batches(self):
+        while True:
+            with self._ready:
+                while not self._pending:
+                    self._ready.wait()
+                records = self._pending.popleft()
+            if records is None:
+                return
+            self._outgoing.send_bytes(records)
+            with self._ready:
+                self._sent += 1
+
+    def send(self, records):
+        with self._ready:
+            self._pending.append(records)
+            self._queued += 1
+            self._ready.notify()
+
+    def flushed(self):
+        with self._ready:
+            return self._sent == self._queued
+
+    def receive(self):
+        records = array('q')
+        try:
+            while self._incoming.poll(0):
+                records.frombytes(self._incoming.recv_bytes())
+        except EOFError:
+            # The previous arc has stopped, which it only does once the election is over
+            pass
+        return records
+
+    def close(self):
+        with self._ready:
+            self._pending.append(None)
+            self._ready.notify()
+        self._sender.join()
+        self._outgoing.close()
+        self._incoming.close()
+
+
+def run_arc(values, states, algorithm_class, step, link, control):
+    """
+    Run the election on one arc of the ring, in a worker process.
+    Messages between nodes of the arc are delivered locally. A message sent past either end of the arc is handed to
+    the link, and the messages arriving from the previous arc are delivered to its first node.
+    :param values: The values of the nodes of the arc.
+    :param states: The state codes of the nodes of the arc.
+    :param algorithm_class: The class of the algorithm. Each worker builds its own instance.
+    :param step: 1 if messages travel to the right, -1 if they travel to the left.
+    :param link: The LinkFactory that builds the link to the neighbouring arcs.
+    :param control: The connection to the coordinator.
+    :return: None. The final values, states and stages are sent to the coordinator.
+    """
+    link = link(control)
+    act = algorithm_class().act
+    size = len(values)
+    stages = [0] * size
+    originator = STATE_CODES[State.ORIGINATOR]
+    # Messages from the previous arc arrive at the first node in the direction of travel
+    entry = 0 if step == 1 else size - 1
+
+    pending = deque((index, None) for index in range(size) if states[index] == originator)
+    outgoing = array('q')
+    messages = 0
+    # Only messages between arcs are counted to detect the end of the election. The local ones are always delivered
+    # before the coordinator hears from us.
+    sent = received = 0
+
+    def handle(index, incoming_message):
+        nonlocal messages
+        state, value, message = act(node_state=STATES[states[index]], node_value=values[index],
+                                    node_stage=stages[index], incoming_message=incoming_message)
+        states[index] = STATE_CODES[state]
+        values[index] = value
+        if message is not None:
+            stages[index] = message.stage
+            messages += 1
+            target = index + step
+            if 0 <= target < size:
+                pending.append((target, message))
+            else:
+                outgoing.extend(encode(message))
+        elif type(incoming_message) is ElectMessage:
+            ElectMessage.release(incoming_message)
+
+    idle = 0
+    while True:
+        while pending:
+            index, message = pending.popleft()
+            # An originator always wakes up before it handles its first message
+            if states[index] == originator:
+                handle(index, None)
+            if message is not None:
+                handle(index, message)
+            if len(outgoing) >= BATCH_SIZE * RECORD_WIDTH:
+                sent += len(outgoing) // RECORD_WIDTH
+                link.send(outgoing)
+                outgoing = array('q')
+
+        if outgoing:
+            sent += len(outgoing) // RECORD_WIDTH
+            link.send(outgoing)
+            outgoing = array('q')
+
+        records = link.receive()
+        if records:
+            received += len(records) // RECORD_WIDTH
+            for start in range(0, len(records), RECORD_WIDTH):
+                pending.append((entry, ElectMessage.create(records[start], records[start + 1], records[start + 2])))
+            idle = 0
+            continue
+
+        # Nothing to do, so answer the coordinator. Back off a little the longer we stay idle.
+        if control.poll(0 if idle < 100 else 0.001):
+            command = control.recv()
+            if command == PROBE:
+                control.send((sent, received) if link.flushed() else None)
+            elif command == STOP:
+                link.close()
+                control.send((values, states, stages, messages))
+                return
+        idle += 1
+
+
+class ShardedEngine(Engine):
+    def __init__(self, processes=None, transport="shared_memory", buffer_capacity=1 << 16):
+        """
+        Splits the ring into contiguous arcs and runs each arc in its own process. Messages within an arc stay in its
+        process, and messages crossing into the next arc go over a ring buffer in shared memory, or a socket.
+        :param processes: The number of worker processes. Defaults to the number of cores.
+        :param transport: "shared_memory" or "socket". Falls back to sockets if shared memory is not available.
+        :param buffer_capacity: The number of messages each shared memory buffer can hold.
+        """
+        if transport not in ("shared_memory", "socket"):
+            raise Exception(f"Unknown transport {transport}, use 'shared_memory' or 'socket'.")
+        self._processes = processes or os.cpu_count() or 1
+        self._transport = transport if SharedMemory is not None else "socket"
+        self._buffer_capacity = buffer_capacity
+
+    @property
+    def transport(self):
+        return self._transport
+
+    def run(self, ring):
+        if not ring.headless:
+            raise Exception("The ShardedEngine cannot record an animation, create the ring with headless=True.")
+
+        nodes = ring.nodes
+        values, states, stages, messages = self.elect([node.value for node in nodes],
+                                                      [node.state for node in nodes],
+                                                      ring.direction, ring.algorithm)
+
+        # Bring the nodes of the ring up to date with the outcome
+        leader = None
+        for node, value, state, stage in zip(nodes, values, states, stages):
+            node.value, node.state, node.stage = value, state, stage
+            if state == State.LEADER:
+                leader = node
+        ring.record_result(leader, messages)
+
+        return ring.leader().value, ring.messages
+
+    def elect(self, values, states, direction: Direction, algorithm: Algorithm):
+        """
+        Run an election over plain lists, without building a Ring. Only the arc of each worker is sent to it.
+        :param values: The values of the nodes from left to right.
+        :param states: The initial states of the nodes.
+        :param direction: The direction to send messages.
+        :param algorithm: The algorithm we are using.
+        :return: (list, list, list, int) --> (final values, final states, final stages, number of messages)
+        """
+        # Nodes are reduced to their value, state and stage, so they have nowhere to keep a memory or a second channel
+        if not algorithm.unidirectional or algorithm.initial_memory() is not None:
+            raise Exception(f"{type(algorithm).__name__} needs channels in both directions or a memory in each node, "
+                            "which only a Ring has.")
+
+        arcs = partition(len(values), min(self._processes, len(values)))
+        step = 1 if direction == Direction.RIGHT else -1
+        # Arc i sends to the arc after it in the direction of travel, and receives from the one before it
+        following = [(i + step) % len(arcs) for i in range(len(arcs))]
+
+        if self._transport == "shared_memory":
+            buffers = [SharedRingBuffer.create(self._buffer_capacity) for _ in arcs]
+            links = [LinkFactory(buffers[i].memory, buffers[following.index(i)].memory) for i in range(len(arcs))]
+        else:
+            buffers = []
+            links = [LinkFactory(os.urandom(32))] * len(arcs)
+
+        context = multiprocessing.get_context()
+        controls, workers = [], []
+        try:
+            for i, (start, end) in enumerate(arcs):
+                control, worker_control = context.Pipe()
+                worker = context.Process(target=run_arc, daemon=True,
+                                         args=(values[start:end],
+                                               [STATE_CODES[state] for state in states[start:end]],
+                                               type(algorithm), step, links[i], worker_control))
+                worker.start()
+                # Only the worker holds its end, so we see the end of the pipe if it fails
+                worker_control.close()
+                controls.append(control)
+                workers.append(worker)
+
+            if self._transport == "socket":
+                # Tell each arc where the next arc is listening
+                addresses = [control.recv() for control in controls]
+                for i, control in enumerate(controls):
+                    control.send(addresses[following[i]])
+
+            self.wait_for_quiescence(controls)
+            for control in controls:
+                control.send(STOP)
+            results = [control.recv() for control in controls]
+        finally:
+            for worker in workers:
+                worker.join()
+            for buffer in buffers:
+                buffer.close()
+                buffer.memory.close()
+                buffer.memory.unlink()
+
+        final_values, final_states, final_stages, messages = [], [], [], 0
+        for arc_values, arc_states, arc_stages, arc_messages in results:
+            final_values.extend(arc_values)
+            final_states.extend(STATES[code] for code in arc_states)
+            final_stages.extend(arc_stages)
+            messages += arc_messages
+        return final_values, final_states, final_stages, messages
+
+    @staticmethod
+    def wait_for_quiescence(controls):
+        """
+        The election is over once every message that crossed between arcs has been received and every worker is idle.
+        Workers only answer when they are idle, so two probes in a row reporting the same, balanced counts show that
+        nothing happened in between.
+        :param controls: The connections to the workers.
+        :return: None
+        """
+        previous = None
+        while True:
+            for control in controls:
+                control.send(PROBE)
+            counts = [control.recv() for control in controls]
+            if None in counts:
+                totals = None
+            else:
+                totals = (sum(sent for sent, _ in counts), sum(received for _, received in counts))
+            if totals is not None and totals[0] == totals[1] and totals == previous:
+                return
+            previous = totals
+            time.sleep(0.001)
+
+
+class LinkFactory:
+    """
+    Holds what a worker needs to build its link, in a form that can be handed to a new process. Either the shared
+    memory of the outgoing and incoming buffers, or the key used to authenticate the sockets.
+    """
+    def __init__(self, *arguments):
+        self._arguments = arguments
+
+    def __call__(self, control):
+        if len(self._arguments) == 1:
+            return SocketLink.connect(control, *self._arguments)
+        outgoing, incoming = self._arguments
+        return SharedMemoryLink(SharedRingBuffer(outgoing), SharedRingBuffer(incoming))
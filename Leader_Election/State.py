@@ -7,3 +7,7 @@ class State(Enum):
     DEFEATED = "Defeated"
     LEADER = "Leader"
     ORIGINATOR = "Originator"
+
+    # Every state is a singleton compared by identity, so it can be hashed by identity as well. This avoids the
+    # Python level hash of Enum, which matters as states are looked up in a table for every message.
+    __hash__ = object.__hash__
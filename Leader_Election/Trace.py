@@ -0,0 +1,220 @@
+import mmap
+import os
+import struct
+from array import array
+from contextlib import nullcontext
+
+from Direction import Direction
+from EventLog import EventLog, STATES, STATE_CODES
+from State import State
+
+# The first bytes of every trace, followed by the version of the format
+MAGIC = b"RINGTRC"
+VERSION = 2
+
+# magic, version, bytes per value, direction, length of the algorithm name, nodes, records
+HEADER = struct.Struct("<7sBBBHQQ")
+DIRECTIONS = tuple(Direction)
+
+
+def record_format(value_size):
+    """
+    A record holds the same fields as a record of the EventLog, packed as tightly as they allow: acting node,
+    old state, new state, stage, old value, new value, receiver, message value.
+    :param value_size: 4 or 8, the number of bytes used for each value.
+    :return: The struct of a record.
+    """
+    value = "i" if value_size == 4 else "q"
+    return struct.Struct(f"<iBBh{value}{value}i{value}")
+
+
+def write_trace(path, event_log: EventLog, algorithm, direction: Direction):
+    """
+    Save an election as a binary trace. The header holds the ring before the election: its values and states, from
+    left to right, and the algorithm. Every state is stored, as a ring that was repaired starts with defeated nodes
+    and a leader, not only with originators. Each step of the event log is then written as a fixed-width record.
+    :param path: The file to write to, or a binary file object, which is left open.
+    :param event_log: The event log of the election.
+    :param algorithm: The algorithm of the election, or its name.
+    :param direction: The direction messages were sent in.
+    :return: None
+    """
+    name = (algorithm if isinstance(algorithm, str) else type(algorithm).__name__).encode()
+    values = event_log.initial_values
+    states = bytes(STATE_CODES[state] for state in event_log.initial_states)
+    records = event_log.records
+    width = EventLog.RECORD_WIDTH
+
+    # Use 32-bit values whenever they fit, which makes the records a third smaller
+    largest = max(max(map(abs, values), default=0), max(map(abs, records), default=0))
+    value_size = 4 if largest < 2 ** 31 else 8
+    record = record_format(value_size)
+
+    with open(path, "wb") if isinstance(path, (str, os.PathLike)) else nullcontext(path) as file:
+        file.write(HEADER.pack(MAGIC, VERSION, value_size, DIRECTIONS.index(direction), len(name), len(values),
+                               len(records) // width))
+        file.write(name)
+        file.write(array("i" if value_size == 4 else "q", values).tobytes())
+        file.write(states)
+
+        # Pack the records in blocks, so that neither the file nor the log is copied whole
+        block = bytearray(record.size * 4096)
+        for start in range(0, len(records), width * 4096):
+            count = 0
+            for offset in range(start, min(start + width * 4096, len(records)), width):
+                index, old_state, new_state, old_value, new_value, stage, receiver, message_value = \
+                    records[offset:offset + width]
+                record.pack_into(block, count * record.size, index, old_state, new_state, stage, old_value,
+                                 new_value, receiver, message_value)
+                count += 1
+            file.write(memoryview(block)[:count * record.size])
+
+
+class TraceReader:
+    """
+    Reads a trace written by write_trace. The file is memory mapped, so any step can be read without loading the
+    rest of the file. It offers the same methods as the EventLog for reading an election, so it can be handed to
+    the Renderer, or to any code that analyses an EventLog.
+    """
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, value_size, direction, name_length, nodes, records = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise Exception(f"{path} is not a trace of an election.")
+        if version != VERSION:
+            raise Exception(f"{path} is a trace of version {version}, but only version {VERSION} can be read.")
+
+        offset = HEADER.size
+        self._algorithm = self._map[offset:offset + name_length].decode()
+        offset += name_length
+        self._direction = DIRECTIONS[direction]
+
+        self._initial_values = array("i" if value_size == 4 else "q", self._map[offset:offset + nodes * value_size])
+        offset += nodes * value_size
+        self._initial_states = self._map[offset:offset + nodes]
+        offset += nodes
+
+        self._record = record_format(value_size)
+        self._records_offset = offset
+        self._length = records + 1
+
+        # The frame we last rebuilt, as in the EventLog
+        self._frame_index = 0
+        self._frame_values = self._initial_values.tolist()
+        self._frame_states = list(self._initial_states)
+
+    def __len__(self):
+        """
+        :return: The number of frames in the trace. One for the initial state and one for each recorded step.
+        """
+        return self._length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    @property
+    def algorithm(self):
+        """
+        :return: The name of the class of the algorithm.
+        """
+        return self._algorithm
+
+    @property
+    def direction(self):
+        return self._direction
+
+    @property
+    def originators(self):
+        """
+        :return: The indices of the originators.
+        """
+        return [index for index, code in enumerate(self._initial_states) if STATES[code] == State.ORIGINATOR]
+
+    @property
+    def initial_values(self):
+        return self._initial_values.tolist()
+
+    @property
+    def initial_states(self):
+        return [STATES[code] for code in self._initial_states]
+
+    def step(self, frame: int):
+        """
+        Read a single record straight from the file.
+        :param frame: The frame we want the step for. Frame 0 is the initial state and has no step.
+        :return: The record that produced the given frame, as a tuple laid out as in the EventLog.
+        """
+        if not 0 < frame < self._length:
+            raise Exception(f"Frame {frame} has no step, the trace has {self._length} frames.")
+
+        index, old_state, new_state, stage, old_value, new_value, receiver, message_value = \
+            self._record.unpack_from(self._map, self._records_offset + (frame - 1) * self._record.size)
+        return index, old_state, new_state, old_value, new_value, stage, receiver, message_value
+
+    def steps(self):
+        """
+        :return: A generator of the records, in the order they were logged.
+        """
+        # Unpack straight from the map, rather than slicing it, which would copy every record
+        unpack_from, size = self._record.unpack_from, self._record.size
+        for offset in range(self._records_offset, self._records_offset + (self._length - 1) * size, size):
+            index, old_state, new_state, stage, old_value, new_value, receiver, message_value = \
+                unpack_from(self._map, offset)
+            yield index, old_state, new_state, old_value, new_value, stage, receiver, message_value
+
+    def frame(self, frame: int):
+        """
+        Rebuild the ring as it was at the given frame, replaying the trace from the last frame we rebuilt.
+        :param frame: The index of the frame, between 0 and len(self) - 1.
+        :return: (list, list) --> (node values, node states)
+        """
+        if not 0 <= frame < self._length:
+            raise Exception(f"Frame {frame} is outside of the trace, which has {self._length} frames.")
+
+        values, states = self._frame_values, self._frame_states
+        while self._frame_index < frame:
+            self._frame_index += 1
+            index, _, new_state, _, new_value, _, _, _ = self.step(self._frame_index)
+            states[index] = new_state
+            values[index] = new_value
+
+        while self._frame_index > frame:
+            index, old_state, _, old_value, _, _, _, _ = self.step(self._frame_index)
+            states[index] = old_state
+            values[index] = old_value
+            self._frame_index -= 1
+
+        return list(values), [STATES[code] for code in states]
+
+    def caption(self, frame: int):
+        """
+        :param frame: The index of the frame.
+        :return: A description of what happened in the given frame.
+        """
+        if frame == 0:
+            return "Initial state"
+
+        values, _ = self.frame(frame)
+        return EventLog.describe(self.step(frame), values)
+
+    def visualize(self, animation_speed, path=None):
+        """
+        Save an animation of the election, replayed from the trace.
+        :param animation_speed: The number of milliseconds per frame.
+        :param path: The file to save to, either a .gif or a .mp4. Named after the algorithm by default.
+        :return: None
+        """
+        from Renderer import Renderer
+        if path is None:
+            path = f'animation_{self._algorithm}.gif'
+        Renderer(self).save(path, animation_speed)
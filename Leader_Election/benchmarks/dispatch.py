@@ -0,0 +1,195 @@
+"""
+Compares the table-driven dispatch of Algorithms.py against the if/elif dispatch it replaced.
+The legacy implementations below are kept verbatim, only to serve as the baseline of this benchmark.
+
+Run from anywhere with: python benchmarks/dispatch.py
+The script exits with a non-zero status if the table-driven algorithms are slower per message.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Algorithms import Algorithm, MinMax, MinMaxPlus
+from Engines import DiscreteEventEngine
+from Message import ElectMessage
+from Ring import Ring, Node, Direction
+from State import State
+
+
+def legacy_fibonacci_number(index):
+    sequence = [0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233]
+    while index + 2 > len(sequence) - 1:
+        sequence.append(sequence[len(sequence) - 1] + sequence[len(sequence) - 2])
+    return sequence[index + 2]
+
+
+def legacy_forwarded_message(incoming_message):
+    incoming_message.counter -= 1
+    return incoming_message
+
+
+def legacy_new_message(incoming_message):
+    incoming_message.stage += 1
+    incoming_message.counter = legacy_fibonacci_number(incoming_message.stage) \
+        if incoming_message.stage % 2 == 0 else -1
+    return incoming_message
+
+
+class LegacyMinMax(Algorithm):
+    def process_message(self, node_state, node_value, incoming_message):
+        if incoming_message.stage % 2 == 0 and incoming_message.value > node_value:
+            return State.CANDIDATE, incoming_message.value, legacy_new_message(incoming_message)
+        elif incoming_message.stage % 2 == 1 and incoming_message.value < node_value:
+            return State.CANDIDATE, incoming_message.value, legacy_new_message(incoming_message)
+        return State.DEFEATED, node_value, None
+
+    def asleep_act(self, node_state, node_value, incoming_message):
+        return State.DEFEATED, node_value, incoming_message
+
+    def originator_act(self, node_state, node_value, incoming_message):
+        return State.CANDIDATE, node_value, ElectMessage(node_value, 1, 0)
+
+    def candidate_act(self, node_state, node_value, incoming_message):
+        if node_value == incoming_message.value:
+            return State.LEADER, node_value, None
+        return self.process_message(node_state, node_value, incoming_message)
+
+    def defeated_act(self, node_state, node_value, incoming_message):
+        return node_state, node_value, incoming_message
+
+    def act(self, node_state, node_value, node_stage, incoming_message):
+        if node_state == State.ORIGINATOR:
+            return self.originator_act(node_state, node_value, incoming_message)
+        elif node_state == State.ASLEEP:
+            return self.asleep_act(node_state, node_value, incoming_message)
+        elif node_state == State.CANDIDATE:
+            return self.candidate_act(node_state, node_value, incoming_message)
+        elif node_state == State.DEFEATED:
+            return self.defeated_act(node_state, node_value, incoming_message)
+
+
+class LegacyMinMaxPlus(Algorithm):
+    def process_message(self, node_state, node_value, incoming_message):
+        if incoming_message.stage % 2 == 0 and incoming_message.value > node_value:
+            return State.CANDIDATE, incoming_message.value, legacy_new_message(incoming_message)
+        elif incoming_message.stage % 2 == 1 and incoming_message.value < node_value:
+            return State.CANDIDATE, incoming_message.value, legacy_new_message(incoming_message)
+        return State.DEFEATED, node_value, None
+
+    def asleep_act(self, node_state, node_value, incoming_message):
+        return State.DEFEATED, node_value, legacy_forwarded_message(incoming_message)
+
+    def originator_act(self, node_state, node_value, incoming_message):
+        return State.CANDIDATE, node_value, ElectMessage(node_value, 1, 0)
+
+    def candidate_act(self, node_state, node_value, node_stage, incoming_message):
+        if node_value == incoming_message.value:
+            return State.LEADER, node_value, None
+        elif incoming_message.counter == 0:
+            return State.CANDIDATE, incoming_message.value, legacy_new_message(incoming_message)
+        elif node_stage < incoming_message.stage:
+            return State.DEFEATED, node_value, legacy_forwarded_message(incoming_message)
+        return self.process_message(node_state, node_value, incoming_message)
+
+    def defeated_act(self, node_state, node_value, node_stage, incoming_message):
+        if isinstance(incoming_message, ElectMessage):
+            if incoming_message.counter == 0:
+                return State.CANDIDATE, incoming_message.value, legacy_new_message(incoming_message)
+            elif node_stage % 2 == 0 and incoming_message.stage == node_stage + 1 \
+                    and incoming_message.value < node_value:
+                return State.CANDIDATE, incoming_message.value, legacy_new_message(incoming_message)
+        return node_state, node_value, legacy_forwarded_message(incoming_message)
+
+    def act(self, node_state, node_value, node_stage, incoming_message):
+        if isinstance(incoming_message, ElectMessage):
+            incoming_message.counter -= 1
+
+        if node_state == State.ORIGINATOR:
+            return self.originator_act(node_state, node_value, incoming_message)
+        elif node_state == State.ASLEEP:
+            return self.asleep_act(node_state, node_value, incoming_message)
+        elif node_state == State.CANDIDATE:
+            return self.candidate_act(node_state, node_value, node_stage, incoming_message)
+        elif node_state == State.DEFEATED:
+            return self.defeated_act(node_state, node_value, node_stage, incoming_message)
+
+
+# The transitions timed in isolation: (name, node state, node value, node stage, message stage)
+TRANSITIONS = [("forward while defeated", State.DEFEATED, 5, 2, 3),
+               ("defeat an asleep node", State.ASLEEP, 5, 0, 1),
+               ("promote a candidate", State.CANDIDATE, 5, 2, 2),
+               ("defeat a candidate", State.CANDIDATE, 5, 3, 3)]
+
+
+def time_transition(algorithm, node_state, node_value, node_stage, message_stage, number):
+    """
+    :return: The best time per call of algorithm.act, in nanoseconds. The message is rebuilt for every call, as
+    the algorithms update it in place, which costs the same for both implementations.
+    """
+    def call():
+        algorithm.act(node_state, node_value, node_stage, ElectMessage(7, message_stage, 9))
+
+    return min(timeit.repeat(call, number=number, repeat=5)) / number * 1e9
+
+
+def time_election(algorithm_class, values, number_of_originators, seed):
+    """
+    :return: (nanoseconds per message, number of messages) for a headless election on the given values.
+    The discrete event engine is used, so both implementations deliver exactly the same messages.
+    """
+    random.seed(seed)
+    ring = Ring([Node(value, None, None) for value in values], Direction.RIGHT, algorithm_class(),
+                number_of_originators, headless=True)
+    start = timeit.default_timer()
+    _, messages = ring.leader_election(DiscreteEventEngine())
+    return (timeit.default_timer() - start) / messages * 1e9, messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10000, help="Number of nodes in the elections.")
+    parser.add_argument("--originators", type=int, default=100, help="Number of originators in the elections.")
+    parser.add_argument("--number", type=int, default=20000, help="Calls per repeat of each transition.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the measurements to this file.")
+    arguments = parser.parse_args()
+
+    pairs = [("MinMax", LegacyMinMax, MinMax), ("MinMaxPlus", LegacyMinMaxPlus, MinMaxPlus)]
+    report = {"transitions": [], "elections": []}
+    slower = False
+
+    print(f"{'algorithm':<12}{'transition':<26}{'if/elif (ns)':>14}{'table (ns)':>12}{'speedup':>9}")
+    for name, legacy, table in pairs:
+        for transition, node_state, node_value, node_stage, message_stage in TRANSITIONS:
+            before = time_transition(legacy(), node_state, node_value, node_stage, message_stage, arguments.number)
+            after = time_transition(table(), node_state, node_value, node_stage, message_stage, arguments.number)
+            print(f"{name:<12}{transition:<26}{before:>14.1f}{after:>12.1f}{before / after:>8.2f}x")
+            report["transitions"].append({"algorithm": name, "transition": transition, "legacy_ns": before,
+                                          "table_ns": after})
+
+    values = list(range(1, arguments.size + 1))
+    random.Random(arguments.seed).shuffle(values)
+    print(f"\n{'algorithm':<12}{'messages':>10}{'if/elif (ns/msg)':>18}{'table (ns/msg)':>16}{'speedup':>9}")
+    for name, legacy, table in pairs:
+        before, messages = min(time_election(legacy, values, arguments.originators, arguments.seed) for _ in range(3))
+        after, table_messages = min(time_election(table, values, arguments.originators, arguments.seed)
+                                    for _ in range(3))
+        print(f"{name:<12}{messages:>10}{before:>18.1f}{after:>16.1f}{before / after:>8.2f}x")
+        report["elections"].append({"algorithm": name, "messages": messages, "table_messages": table_messages,
+                                    "legacy_ns_per_message": before, "table_ns_per_message": after})
+        slower = slower or after > before
+
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Guards the cost of importing the election code. Workers in a process pool import Ring before doing any work,
+so Ring must not pull in the plotting libraries, which are only needed for animations.
+
+Run from anywhere with: python benchmarks/import_time.py
+The script exits with a non-zero status if a plotting library is imported or the import is over budget.
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# The directory holding Ring.py
+SOURCE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules that must not be loaded by importing Ring
+FORBIDDEN_MODULES = ["igraph", "matplotlib", "numpy"]
+
+MEASURE = """
+import sys, time
+start = time.perf_counter()
+from Ring import Ring, Node, Direction
+elapsed = time.perf_counter() - start
+print(repr((elapsed, [module for module in {forbidden!r} if module in sys.modules])))
+"""
+
+
+def measure_import(statement=MEASURE):
+    """
+    Import Ring in a fresh interpreter, so nothing is already cached in sys.modules.
+    :return: (float, list) --> (seconds spent importing, forbidden modules that were imported)
+    """
+    output = subprocess.run([sys.executable, "-c", statement.format(forbidden=FORBIDDEN_MODULES)],
+                            cwd=SOURCE_DIRECTORY, capture_output=True, text=True, check=True).stdout
+    elapsed, loaded = ast.literal_eval(output)
+    return elapsed, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10, help="Number of fresh interpreters to time.")
+    parser.add_argument("--budget", type=float, default=0.05, help="Maximum median import time in seconds.")
+    parser.add_argument("--json", help="Write the measurements to this file.")
+    arguments = parser.parse_args()
+
+    timings, loaded = [], set()
+    for _ in range(arguments.repeat):
+        elapsed, modules = measure_import()
+        timings.append(elapsed)
+        loaded.update(modules)
+
+    median = statistics.median(timings)
+    print(f"Importing Ring took {median * 1000:.1f}ms (median of {arguments.repeat}), "
+          f"the budget is {arguments.budget * 1000:.1f}ms")
+    if loaded:
+        print(f"Importing Ring also imported: {', '.join(sorted(loaded))}")
+
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            json.dump({"median": median, "timings": timings, "loaded": sorted(loaded),
+                       "budget": arguments.budget}, file, indent=2)
+
+    return 1 if loaded or median > arguments.budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
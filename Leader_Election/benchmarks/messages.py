@@ -0,0 +1,131 @@
+"""
+Compares the slotted messages of Message.py against the property based messages they replaced.
+The legacy implementation below is kept verbatim, only to serve as the baseline of this benchmark.
+
+Run from anywhere with: python benchmarks/messages.py
+The script exits with a non-zero status if the slotted messages are slower per hop or use more memory.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+from abc import ABC
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Algorithms import forwarded_message, new_message
+from Message import ElectMessage
+
+
+class LegacyMessage(ABC):
+    def __init__(self, value):
+        self._value = value
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+
+class LegacyElectMessage(LegacyMessage):
+    def __init__(self, value: int, stage: int, counter: int):
+        self._stage = stage
+        self._counter = counter
+        super().__init__(value)
+
+    @property
+    def stage(self):
+        return self._stage
+
+    @property
+    def counter(self):
+        return self._counter
+
+    @stage.setter
+    def stage(self, stage):
+        self._stage = stage
+
+    @counter.setter
+    def counter(self, counter):
+        self._counter = counter
+
+
+def hop(message):
+    # A hop of MinMaxPlus: the counter is reduced, the value is compared, and the message is forwarded and promoted
+    message.counter -= 1
+    if message.value > 0:
+        forwarded_message(message)
+    new_message(message)
+    # Keep the message in the first stage, so that every call does the same work
+    message.stage = 1
+
+
+def time_per_call(function, number):
+    """
+    :return: The best time per call of the function, in nanoseconds.
+    """
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e9
+
+
+def time_free_list(number):
+    """
+    :return: The best time to take a message from the free list and release it again, in nanoseconds.
+    """
+    ElectMessage.pooling = True
+    try:
+        return time_per_call(lambda: ElectMessage.release(ElectMessage.create(7, 1, 0)), number)
+    finally:
+        ElectMessage.pooling = False
+
+
+def bytes_per_message(create, count=10000):
+    """
+    :return: The number of bytes allocated per live message.
+    """
+    tracemalloc.start()
+    messages = [create() for _ in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del messages
+    return size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=100000, help="Calls per repeat of each measurement.")
+    parser.add_argument("--json", help="Write the measurements to this file.")
+    arguments = parser.parse_args()
+
+    legacy, slotted = LegacyElectMessage(7, 1, 0), ElectMessage(7, 1, 0)
+
+    report = {
+        "hop_ns": {"legacy": time_per_call(lambda: hop(legacy), arguments.number),
+                   "slotted": time_per_call(lambda: hop(slotted), arguments.number)},
+        "create_ns": {"legacy": time_per_call(lambda: LegacyElectMessage(7, 1, 0), arguments.number),
+                      "slotted": time_per_call(lambda: ElectMessage(7, 1, 0), arguments.number),
+                      "free_list": time_free_list(arguments.number)},
+        "bytes_per_message": {"legacy": bytes_per_message(lambda: LegacyElectMessage(7, 1, 0)),
+                              "slotted": bytes_per_message(lambda: ElectMessage(7, 1, 0))},
+    }
+
+    for measurement, results in report.items():
+        baseline = results["legacy"]
+        print(f"{measurement:<18}" + "".join(f"{name:>10}: {value:8.1f} ({baseline / value:.2f}x)"
+                                             for name, value in results.items()))
+
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+    worse = report["hop_ns"]["slotted"] > report["hop_ns"]["legacy"] or \
+        report["bytes_per_message"]["slotted"] > report["bytes_per_message"]["legacy"]
+    return 1 if worse else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Benchmarks MinMax and MinMaxPlus across ring sizes, numbers of originators and orderings of the values.
+Every election is seeded, so the leader and the number of messages of each case are the same from run to run, and
+only the time and memory can change. The hot paths of an election, Node.handle, Channel.push with Node.receive,
+Algorithm.act and new_message, are also timed on their own.
+
+Run from anywhere with: python benchmarks/suite.py --json report.json
+The quick preset goes up to rings of 10^4 nodes, the full preset up to 10^6. Pass --baseline with the report of an
+earlier run to compare against it. The script then exits with a non-zero status if any case got slower or used more
+memory than the tolerance allows, or if the number of messages of any case changed.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Algorithms import MinMax, MinMaxPlus, new_message
+from Engines import DiscreteEventEngine, SynchronousEngine
+from Generators import ORDERINGS, generate_values
+from Message import ElectMessage
+from Ring import Ring, Node, Direction
+from State import State
+
+ALGORITHMS = {"MinMax": MinMax, "MinMaxPlus": MinMaxPlus}
+ENGINES = {"discrete": DiscreteEventEngine, "synchronous": SynchronousEngine}
+
+PRESETS = {
+    "quick": {"sizes": [10, 100, 1000, 10000], "originators": [1, 10, 100]},
+    "full": {"sizes": [10, 100, 1000, 10000, 100000, 1000000], "originators": [1, 10, 100, 1000]},
+}
+
+
+def build_ring(algorithm, ordering, size, originators, seed):
+    """
+    :return: A headless ring, whose values and originators only depend on the seed.
+    """
+    return Ring([Node(value, None, None) for value in generate_values(size, ordering, seed)], Direction.RIGHT,
+                ALGORITHMS[algorithm](), originators, headless=True, seed=seed)
+
+
+def run_case(algorithm, ordering, size, originators, seed, engine, repeat):
+    """
+    Time the election of a single case. The ring is built once and reset between repeats, so only the election is
+    timed. The peak memory is measured on a separate run, as tracing the allocations slows the election down.
+    :return: A dictionary describing the case and its measurements.
+    """
+    ring = build_ring(algorithm, ordering, size, originators, seed)
+
+    times = []
+    for _ in range(repeat):
+        ring.reset()
+        start_time = time.perf_counter()
+        leader, messages = ring.leader_election(ENGINES[engine]())
+        times.append(time.perf_counter() - start_time)
+
+    ring.reset()
+    tracemalloc.start()
+    ring.leader_election(ENGINES[engine]())
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"algorithm": algorithm, "ordering": ordering, "size_of_ring": size, "number_of_originators": originators,
+            "seed": seed, "leader": leader, "messages": messages, "time": min(times), "peak_memory": peak_memory}
+
+
+def time_per_call(function, number):
+    """
+    :return: The best time per call of the function, in nanoseconds.
+    """
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e9
+
+
+def time_hot_paths(number):
+    """
+    Time the functions every message of an election goes through.
+    :return: A dictionary mapping each hot path onto its time per call, in nanoseconds.
+    """
+    report = {"new_message": time_per_call(lambda: new_message(ElectMessage(7, 1, 0)), number)}
+
+    for name, algorithm in ALGORITHMS.items():
+        act = algorithm().act
+        # A defeated node forwarding a message is the most common step of both algorithms
+        message = ElectMessage(7, 2, 5)
+        report[f"{name}.act"] = time_per_call(
+            lambda: act(node_state=State.DEFEATED, node_value=3, node_stage=1, incoming_message=message), number)
+
+    # Two defeated nodes, where the first forwards each message it is given to the second
+    ring = Ring([Node(1, None, None), Node(2, None, None)], Direction.RIGHT, MinMax(), 0, headless=True)
+    first, second = ring.nodes
+    first.state = second.state = State.DEFEATED
+    algorithm = ring.algorithm
+    channel = first.channels[Direction.RIGHT]
+    message = ElectMessage(7, 2, 5)
+
+    report["Node.handle"] = time_per_call(lambda: first.handle(algorithm, message), number)
+
+    def hop():
+        channel.push(message)
+        second.receive()
+
+    report["Channel.push + Node.receive"] = time_per_call(hop, number)
+    return report
+
+
+def compare(report, baseline, tolerance, min_time):
+    """
+    :param report: The report of this run.
+    :param baseline: The report of an earlier run.
+    :param tolerance: How much slower or bigger a measurement can get, as a fraction of the baseline.
+    :param min_time: Elections faster than this many seconds are too short to time reliably, so their time is ignored.
+    :return: A list describing every regression.
+    """
+    regressions = []
+    for name, value in report["hot_paths"].items():
+        before = baseline["hot_paths"].get(name)
+        if before is not None and value > before * (1 + tolerance):
+            regressions.append(f"{name}: {before:.1f}ns -> {value:.1f}ns")
+
+    def key(case):
+        return case["algorithm"], case["ordering"], case["size_of_ring"], case["number_of_originators"], case["seed"]
+
+    earlier = {key(case): case for case in baseline["elections"]}
+    for case in report["elections"]:
+        before = earlier.get(key(case))
+        if before is None:
+            continue
+        name = "{} {} n={} k={}".format(*key(case))
+        if case["messages"] != before["messages"] or case["leader"] != before["leader"]:
+            regressions.append(f"{name}: elected {before['leader']} with {before['messages']} messages, "
+                               f"now {case['leader']} with {case['messages']} messages")
+        for measurement in ("time", "peak_memory"):
+            if measurement == "time" and before["time"] < min_time:
+                continue
+            if case[measurement] > before[measurement] * (1 + tolerance):
+                regressions.append(f"{name}: {measurement} {before[measurement]:.6g} -> {case[measurement]:.6g}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", choices=PRESETS, default="quick", help="The sizes and originators to run.")
+    parser.add_argument("--sizes", type=int, nargs="+", help="The sizes of ring, instead of those of the preset.")
+    parser.add_argument("--originators", type=int, nargs="+",
+                        help="The numbers of originators, instead of those of the preset.")
+    parser.add_argument("--orderings", nargs="+", choices=ORDERINGS, default=list(ORDERINGS))
+    parser.add_argument("--algorithms", nargs="+", choices=ALGORITHMS, default=list(ALGORITHMS))
+    parser.add_argument("--engine", choices=ENGINES, default="discrete", help="The engine running the elections.")
+    parser.add_argument("--seed", type=int, default=0, help="The seed the seed of each case is derived from.")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Elections timed per case, the best is kept. Rings over 10^5 nodes are timed once.")
+    parser.add_argument("--number", type=int, default=100000, help="Calls per repeat of each hot path.")
+    parser.add_argument("--json", help="Write the report to this file.")
+    parser.add_argument("--baseline", help="The report of an earlier run to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="How much slower or bigger a measurement can get before it is a regression.")
+    parser.add_argument("--min-time", type=float, default=0.005,
+                        help="Elections faster than this many seconds are not compared on time.")
+    arguments = parser.parse_args()
+
+    sizes = arguments.sizes or PRESETS[arguments.preset]["sizes"]
+    numbers_of_originators = arguments.originators or PRESETS[arguments.preset]["originators"]
+
+    report = {
+        "environment": {"python": platform.python_version(), "implementation": platform.python_implementation(),
+                        "machine": platform.machine(), "engine": arguments.engine},
+        "hot_paths": time_hot_paths(arguments.number),
+        "elections": [],
+    }
+    for name, value in report["hot_paths"].items():
+        print(f"{name:<20}{value:10.1f}ns")
+
+    for size in sizes:
+        for originators in sorted({min(originators, size) for originators in numbers_of_originators}):
+            for ordering in arguments.orderings:
+                for algorithm in arguments.algorithms:
+                    # Both algorithms run on the same ring
+                    seed = f"{arguments.seed}-{ordering}-{size}-{originators}"
+                    repeat = arguments.repeat if size <= 10 ** 5 else 1
+                    case = run_case(algorithm, ordering, size, originators, seed, arguments.engine, repeat)
+                    report["elections"].append(case)
+                    print(f"{algorithm:<12}{ordering:<15}n={size:<9}k={originators:<6}"
+                          f"messages={case['messages']:<11}time={case['time']:.4f}s  "
+                          f"peak_memory={case['peak_memory'] / 2 ** 20:.1f}MiB")
+
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if arguments.baseline is None:
+        return 0
+
+    with open(arguments.baseline) as file:
+        regressions = compare(report, json.load(file), arguments.tolerance, arguments.min_time)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
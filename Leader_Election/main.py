@@ -1,6 +1,16 @@
 from Ring import Node, Direction, Ring
 from Algorithms import MinMax, MinMaxPlus
+from Engines import SynchronousEngine
+from Generators import generate_values
+from Cache import ResultCache, ring_key
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, product
+import csv
+import math
+import os
 import random
+import time
+import tracemalloc
 
 
 def generate_random_ring(size):
@@ -11,7 +21,19 @@ def generate_random_ring(size):
     return nodes
 
 
-def run_experiments(number_of_originators=2, size_of_ring=10, direction=Direction.RIGHT, animation_speed=500):
+def generate_ring(size, ordering="random", seed=None):
+    """
+    Build the nodes of a ring straight from one of the orderings of Generators.ORDERINGS, without first building a
+    list of the values.
+    :param ordering: "random", "sorted", "reverse_sorted", "zig_zag", "bit_reversal" or "max_stages".
+    :param seed: The seed of the random ordering.
+    :return: The nodes, ready to be handed to a Ring.
+    """
+    return [Node(value, None, None) for value in generate_values(size, ordering, seed)]
+
+
+def run_experiments(number_of_originators=2, size_of_ring=10, direction=Direction.RIGHT, animation_speed=500,
+                    animation=True):
     # Let's generate a couple nodes to start and make sure we can graph them properly
     nodes_min_max = generate_random_ring(size_of_ring)
     nodes_min_max_plus = generate_random_ring(size_of_ring)
@@ -21,8 +43,10 @@ def run_experiments(number_of_originators=2, size_of_ring=10, direction=Directio
     min_max_plus = MinMaxPlus()
 
     # Now let's link up the nodes in a ring
-    ring_min_max = Ring(nodes_min_max, direction, min_max, number_of_originators)
-    ring_min_max_plus = Ring(nodes_min_max_plus, direction, min_max_plus, number_of_originators)
+    # Without animation there is nothing to record, so the rings can run headless
+    ring_min_max = Ring(nodes_min_max, direction, min_max, number_of_originators, headless=not animation)
+    ring_min_max_plus = Ring(nodes_min_max_plus, direction, min_max_plus, number_of_originators,
+                             headless=not animation)
 
     # Print all edges in order
     print(f"The edges (in direction {direction.value}) for the ring executing min-max are: "
@@ -42,8 +66,253 @@ def run_experiments(number_of_originators=2, size_of_ring=10, direction=Directio
     print(f"It required a total of {messages_min_max_plus} messages")
 
     # Time to visualize the graph
-    ring_min_max.visualize(animation_speed=animation_speed)
-    ring_min_max_plus.visualize(animation_speed=animation_speed)
+    if animation:
+        ring_min_max.visualize(animation_speed=animation_speed)
+        ring_min_max_plus.visualize(animation_speed=animation_speed)
+
+
+# The columns written for every trial of a batch
+TRIAL_COLUMNS = ["algorithm", "size_of_ring", "number_of_originators", "direction", "trial", "seed",
+                 "leader", "messages", "rounds", "wall_time", "peak_memory"]
+# The measurements we aggregate for every configuration of a batch
+MEASUREMENTS = ["messages", "rounds", "wall_time", "peak_memory"]
+
+
+# The caches opened by this process, by path. Each worker of a batch opens its own connection to a cache.
+_caches = {}
+
+
+def open_cache(path):
+    """
+    :param path: The file of a ResultCache.
+    :return: The ResultCache of this process for the given file, opened the first time it is asked for.
+    """
+    key = (os.fspath(path), os.getpid())
+    if key not in _caches:
+        _caches[key] = ResultCache(path)
+    return _caches[key]
+
+
+def run_trial(algorithm, size_of_ring, number_of_originators, direction, trial, seed, engine=None,
+              track_memory=True, ordering=None, originator_strategy="random", cache_path=None):
+    """
+    Run a single election without any printing or animation.
+    :param algorithm: The class of the algorithm to run.
+    :param trial: The number of the trial within its configuration.
+    :param seed: The seed of the random ring and originators.
+    :param engine: The engine used for the election. By default, one thread per originator. Only the
+    SynchronousEngine measures the number of rounds, with any other engine it is None.
+    :param track_memory: Whether to measure the peak memory of the trial. This slows the election down.
+    :param ordering: The ordering of the values, from Generators.ORDERINGS. By default, a shuffled list.
+    :param originator_strategy: How the originators are chosen, from Generators.ORIGINATOR_STRATEGIES.
+    :param cache_path: If given, the file of a ResultCache. A trial whose election is already in the cache is not run
+    again, and returns the measurements of the run that stored it.
+    :return: A dictionary with an entry for each of the TRIAL_COLUMNS.
+    """
+    if track_memory:
+        tracemalloc.start()
+
+    random.seed(seed)
+    nodes = generate_random_ring(size_of_ring) if ordering is None else generate_ring(size_of_ring, ordering, seed)
+    ring = Ring(nodes, direction, algorithm(), number_of_originators, headless=True,
+                originator_strategy=originator_strategy)
+
+    row = {"algorithm": algorithm.__name__, "size_of_ring": size_of_ring,
+           "number_of_originators": number_of_originators, "direction": direction.value, "trial": trial,
+           "seed": seed}
+
+    if cache_path is not None:
+        cache = open_cache(cache_path)
+        key = ring_key(ring, engine)
+        result = cache.get(key)
+        if result is not None:
+            if track_memory:
+                tracemalloc.stop()
+            return {**row, "leader": result.leader, "messages": result.messages, **result.measurements}
+
+    start_time = time.perf_counter()
+    leader, messages = ring.leader_election(engine)
+    wall_time = time.perf_counter() - start_time
+
+    peak_memory = None
+    if track_memory:
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    rounds = engine.statistics.rounds_to_leader if isinstance(engine, SynchronousEngine) else None
+    measurements = {"rounds": rounds, "wall_time": wall_time, "peak_memory": peak_memory}
+
+    if cache_path is not None:
+        cache.put(key, leader, messages, measurements)
+
+    return {**row, "leader": leader, "messages": messages, **measurements}
+
+
+def _run_trial(arguments):
+    # The process pool can only hand a single argument to the function it maps over
+    return run_trial(*arguments)
+
+
+class RunningStatistics:
+    """
+    Keeps the count, mean, standard deviation, minimum and maximum of a stream of values without storing them.
+    Uses Welford's algorithm, so that the variance stays accurate over many trials.
+    Without any values, such as the peak memory of trials that did not track it, every statistic but the count is
+    None, which write_summary leaves as an empty cell.
+    """
+    def __init__(self):
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._minimum = math.inf
+        self._maximum = -math.inf
+
+    def add(self, value):
+        if value is None:
+            return
+        self._count += 1
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+        self._minimum = min(self._minimum, value)
+        self._maximum = max(self._maximum, value)
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def mean(self):
+        return self._mean if self._count else None
+
+    @property
+    def std(self):
+        if not self._count:
+            return None
+        return math.sqrt(self._m2 / (self._count - 1)) if self._count > 1 else 0.0
+
+    @property
+    def minimum(self):
+        return self._minimum if self._count else None
+
+    @property
+    def maximum(self):
+        return self._maximum if self._count else None
+
+
+class _ParquetWriter:
+    """
+    Writes the rows of each chunk as a row group of a Parquet file. Needs pyarrow, which we only import when asked for.
+    """
+    def __init__(self, path):
+        import pyarrow
+        import pyarrow.parquet
+
+        self._pyarrow = pyarrow
+        self._writer = pyarrow.parquet.ParquetWriter(path, pyarrow.schema([
+            ("algorithm", pyarrow.string()), ("size_of_ring", pyarrow.int64()),
+            ("number_of_originators", pyarrow.int64()), ("direction", pyarrow.string()), ("trial", pyarrow.int64()),
+            ("seed", pyarrow.string()), ("leader", pyarrow.int64()), ("messages", pyarrow.int64()),
+            ("rounds", pyarrow.int64()), ("wall_time", pyarrow.float64()), ("peak_memory", pyarrow.int64())]))
+
+    def write_rows(self, rows):
+        self._writer.write_table(self._pyarrow.Table.from_pylist(rows, schema=self._writer.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=TRIAL_COLUMNS)
+        self._writer.writeheader()
+
+    def write_rows(self, rows):
+        self._writer.writerows(rows)
+        # Flush every chunk, so the results of a long batch can be inspected while it is running
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def run_batch_experiments(results_path, algorithms=(MinMax, MinMaxPlus), sizes_of_ring=(10, 100, 1000),
+                          numbers_of_originators=(1, 5, 10), directions=(Direction.RIGHT,), trials=100, seed=0,
+                          engine=None, processes=None, chunk_size=1000, track_memory=True, summary_path=None,
+                          ordering=None, originator_strategy="random", cache_path=None):
+    """
+    Run many elections for every combination of the given parameters, spread over a pool of processes.
+    The results of each trial are streamed to a CSV file, or to a Parquet file if the path ends with ".parquet".
+    Nothing is animated, and the grid is worked through in chunks so that memory stays flat however many trials we run.
+    Trials with the same number in the same configuration use the same ring for every algorithm, so the algorithms
+    can be compared pairwise.
+    :param results_path: The file the per trial results are written to.
+    :param trials: The number of trials for each configuration.
+    :param seed: The seed the seed of each trial is derived from.
+    :param engine: The engine used for the elections. By default, one thread per originator.
+    :param processes: The number of worker processes. Defaults to the number of CPUs.
+    :param chunk_size: The number of trials handed to the pool at once.
+    :param track_memory: Whether to measure the peak memory of each trial. This slows the elections down.
+    :param summary_path: If given, the aggregated statistics are also written to this CSV file.
+    :param ordering: The ordering of the values of every ring, from Generators.ORDERINGS. By default, shuffled.
+    :param originator_strategy: How the originators of every ring are chosen, from Generators.ORIGINATOR_STRATEGIES.
+    :param cache_path: If given, the file of a ResultCache shared by the workers. Trials already in the cache are not
+    run again, so an interrupted batch can be resumed by running it again with the same cache.
+    :return: A dictionary mapping each configuration (algorithm, size, originators, direction) onto a dictionary
+    mapping each measurement onto its RunningStatistics.
+    """
+    # Configurations with more originators than nodes are skipped
+    configurations = [(algorithm, size, originators, direction) for algorithm, size, originators, direction
+                      in product(algorithms, sizes_of_ring, numbers_of_originators, directions) if originators <= size]
+    tasks = ((algorithm, size, originators, direction, trial, f"{seed}-{size}-{originators}-{direction.value}-{trial}",
+              engine, track_memory, ordering, originator_strategy, cache_path)
+             for algorithm, size, originators, direction in configurations for trial in range(trials))
+
+    statistics = {(algorithm.__name__, size, originators, direction.value):
+                  {measurement: RunningStatistics() for measurement in MEASUREMENTS}
+                  for algorithm, size, originators, direction in configurations}
+
+    writer = _ParquetWriter(results_path) if str(results_path).endswith(".parquet") else _CsvWriter(results_path)
+    try:
+        processes = os.cpu_count() if processes is None else processes
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            # Hand each worker a few batches per chunk, which balances the load without much overhead
+            chunksize = max(1, chunk_size // (4 * processes))
+            while chunk := list(islice(tasks, chunk_size)):
+                rows = list(executor.map(_run_trial, chunk, chunksize=chunksize))
+                writer.write_rows(rows)
+
+                for row in rows:
+                    key = (row["algorithm"], row["size_of_ring"], row["number_of_originators"], row["direction"])
+                    for measurement in MEASUREMENTS:
+                        statistics[key][measurement].add(row[measurement])
+    finally:
+        writer.close()
+
+    if summary_path is not None:
+        write_summary(statistics, summary_path)
+
+    return statistics
+
+
+def write_summary(statistics, summary_path):
+    """
+    Write the aggregated statistics of a batch to a CSV file, with one row per configuration.
+    :param statistics: The statistics returned by run_batch_experiments.
+    :param summary_path: The file to write to.
+    :return: None
+    """
+    with open(summary_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["algorithm", "size_of_ring", "number_of_originators", "direction", "trials"] +
+                        [f"{measurement}_{statistic}" for measurement in MEASUREMENTS
+                         for statistic in ("mean", "std", "min", "max")])
+        for key, measurements in statistics.items():
+            writer.writerow(list(key) + [measurements["messages"].count] +
+                            [value for measurement in MEASUREMENTS for value in
+                             (measurements[measurement].mean, measurements[measurement].std,
+                              measurements[measurement].minimum, measurements[measurement].maximum)])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,67 @@
+"""
+Checks that a repair can be reset and run again with the same outcome, whichever way it restored the leader.
+
+Run from anywhere with: python -m unittest discover Leader_Election/tests
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Algorithms import MinMax, MinMaxPlus  # noqa: E402
+from Engines import DiscreteEventEngine, ThreadedEngine  # noqa: E402
+from Ring import Ring, Node, Direction  # noqa: E402
+from State import State  # noqa: E402
+
+
+def random_ring(rng, seed):
+    size = rng.randint(3, 40)
+    nodes = [Node(value, None, None) for value in rng.sample(range(1, 10 * size), size)]
+    return Ring(nodes, rng.choice(list(Direction)), rng.choice([MinMax, MinMaxPlus])(), rng.randint(1, size),
+                headless=seed % 2 == 0, seed=seed)
+
+
+class TestRepair(unittest.TestCase):
+    def test_reset_replays_a_repair_without_the_leader(self):
+        rng = random.Random(0)
+        for seed in range(200):
+            ring = random_ring(rng, seed)
+            ring.leader_election(DiscreteEventEngine())
+            ring.remove_node(ring.leader())
+            result = ring.repair(DiscreteEventEngine())
+            states = [node.state for node in ring.nodes]
+
+            ring.reset()
+            self.assertEqual(ring.repair(DiscreteEventEngine()), result, seed)
+            self.assertEqual([node.state for node in ring.nodes], states, seed)
+
+    def test_reset_replays_a_repair_that_kept_the_leader(self):
+        rng = random.Random(1)
+        for seed in range(200):
+            ring = random_ring(rng, seed)
+            ring.leader_election(DiscreteEventEngine())
+            node = ring.insert_node(10 ** 6, rng.randint(0, len(ring.nodes)))
+            result = ring.repair()
+
+            ring.reset()
+            self.assertEqual(node.state, State.ASLEEP)
+            # Only repair can tell the new node about the leader, an election would leave the ring broken
+            with self.assertRaises(Exception):
+                ring.leader_election(ThreadedEngine())
+            self.assertEqual(ring.repair(), result, seed)
+            self.assertEqual(node.state, State.DEFEATED)
+
+    def test_insert_node_checks_the_position(self):
+        ring = Ring([Node(value, None, None) for value in (3, 1, 2)], Direction.RIGHT, MinMax(), 1, headless=True)
+        for position in (-1, 4):
+            with self.assertRaises(ValueError):
+                ring.insert_node(5, position)
+        self.assertEqual(len(ring.nodes), 3)
+        ring.insert_node(5, 3)
+        self.assertIs(ring.nodes[-1].right, ring.nodes[0])
+
+
+if __name__ == "__main__":
+    unittest.main()